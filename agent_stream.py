@@ -0,0 +1,90 @@
+import asyncio
+import queue
+import threading
+
+# --- Streaming agent runs for the Streamlit chat loop ---
+# Streamlit elements can only be updated from the script thread, while the agent runs on a
+# long-lived asyncio loop (so the async Cal.com client and its connections are reused across
+# turns and sessions). stream_agent_events bridges the two with a queue.
+
+TOOL_STATUS = {
+    "list_event_types": "Looking up event types…",
+    "get_available_slots": "Checking availability…",
+    "book_cal_event": "Booking the event…",
+    "list_cal_events": "Looking up events…",
+    "cancel_cal_event": "Cancelling the event…",
+    "reschedule_cal_event": "Rescheduling the event…",
+    "create_cal_event_type": "Creating the event type…"
+}
+
+_DONE = object()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+def get_event_loop():
+    """
+    Returns the process-wide asyncio loop that agent runs are scheduled on, starting its thread on first use.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def tool_status(tool_name):
+    return TOOL_STATUS.get(tool_name, f"Running {tool_name}…")
+
+def _translate(event):
+    """
+    Maps an astream_events (v2) event to ("token", text), ("tool_start", name, input),
+    ("tool_end", name, output) or ("output", text); returns None for events the UI ignores.
+    """
+    kind = event["event"]
+    if kind == "on_chat_model_stream":
+        content = event["data"]["chunk"].content
+        if content and isinstance(content, str):
+            return ("token", content)
+    elif kind == "on_tool_start":
+        return ("tool_start", event["name"], event["data"].get("input"))
+    elif kind == "on_tool_end":
+        return ("tool_end", event["name"], event["data"].get("output"))
+    elif kind == "on_chain_end" and not event.get("parent_ids"):
+        output = event["data"].get("output")
+        if isinstance(output, dict) and "output" in output:
+            return ("output", output["output"])
+    return None
+
+def stream_agent_events(agent_executor, inputs, config=None):
+    """
+    Runs agent_executor.astream_events on the background loop and yields UI events (see _translate)
+    as they happen. Errors raised by the run are re-raised here. Closing the generator early
+    (e.g. when Streamlit stops the script) cancels the run.
+    """
+    events = queue.Queue()
+
+    async def produce():
+        try:
+            async for event in agent_executor.astream_events(inputs, config=config, version="v2"):
+                item = _translate(event)
+                if item is not None:
+                    events.put(item)
+        except Exception as e:
+            events.put(("error", e))
+        finally:
+            events.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    try:
+        while True:
+            item = events.get()
+            if item is _DONE:
+                break
+            if item[0] == "error":
+                raise item[1]
+            yield item
+    finally:
+        future.cancel()
@@ -1,109 +1,679 @@
 import requests
-import json
+import httpx
+import asyncio
 import os
-from datetime import datetime
+import random
+import threading
+import time
+import weakref
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 
-from langchain_core.tools import tool
+from dateutil.parser import isoparse
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from langchain_core.tools import StructuredTool, tool
+
+from cache import BookingIndex, SlotCache, TTLCache, contiguous_runs
+import fastjson
+import metrics
+import recorder
+import tracing
+from circuit import CircuitBreakers
+from mirror import CalMirror, account_for
+from ratelimit import READ, WRITE, RateLimiter
 
 # --- Configuration (Moved from main app for modularity) ---
-CAL_API_BASE_URL = "https://api.cal.com/v1/"
+CAL_API_BASE_URL = os.getenv("CAL_API_BASE_URL", "https://api.cal.com/v1/")  # Overridden by the benchmark harness (bench/)
 
 CAL_API_KEY_ENV = os.getenv("CAL_API_KEY")
 
+# --- HTTP connection pool ---
+# Connections to api.cal.com are kept alive and shared by every tool. The pool is
+# module-level, so it survives Streamlit reruns (which only re-execute streamlit.py).
+CAL_HTTP_POOL_CONNECTIONS = int(os.getenv("CAL_HTTP_POOL_CONNECTIONS", "4"))  # Number of per-host pools to keep
+CAL_HTTP_POOL_MAXSIZE = int(os.getenv("CAL_HTTP_POOL_MAXSIZE", "10"))  # Max open connections per host
+CAL_HTTP_POOL_BLOCK = os.getenv("CAL_HTTP_POOL_BLOCK", "true").lower() in ("1", "true", "yes")
+CAL_HTTP_CONNECT_TIMEOUT = float(os.getenv("CAL_HTTP_CONNECT_TIMEOUT", "3.05"))  # Seconds
+CAL_HTTP_READ_TIMEOUT = float(os.getenv("CAL_HTTP_READ_TIMEOUT", "20"))  # Seconds
+CAL_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("CAL_HTTP_KEEPALIVE_EXPIRY", "30"))  # Seconds an idle async connection is kept
+
+# --- Retries ---
+# Transient Cal.com failures (429, 5xx gateway errors, dropped connections) are retried here,
+# instead of going back to the LLM as an error and costing a whole agent round trip.
+CAL_HTTP_RETRIES = int(os.getenv("CAL_HTTP_RETRIES", "3"))  # Retries after the first attempt
+CAL_HTTP_BACKOFF_BASE = float(os.getenv("CAL_HTTP_BACKOFF_BASE", "0.25"))  # Seconds; doubled per retry
+CAL_HTTP_BACKOFF_MAX = float(os.getenv("CAL_HTTP_BACKOFF_MAX", "4"))  # Seconds
+CAL_HTTP_RETRY_BUDGET = float(os.getenv("CAL_HTTP_RETRY_BUDGET", "30"))  # Seconds for all attempts of one request
+CAL_HTTP_RETRY_STATUSES = {500, 502, 503, 504}
+
+# --- Client-side rate limit ---
+# Every attempt takes a token first (see ratelimit.py). Set CAL_RATE_LIMIT_PATH to share the
+# budget with other processes using the same API key; a rate of 0 disables that budget.
+CAL_RATE_LIMIT_READ_RPS = float(os.getenv("CAL_RATE_LIMIT_READ_RPS", "1.5"))
+CAL_RATE_LIMIT_READ_BURST = float(os.getenv("CAL_RATE_LIMIT_READ_BURST", "10"))
+CAL_RATE_LIMIT_WRITE_RPS = float(os.getenv("CAL_RATE_LIMIT_WRITE_RPS", "0.5"))
+CAL_RATE_LIMIT_WRITE_BURST = float(os.getenv("CAL_RATE_LIMIT_WRITE_BURST", "5"))
+CAL_RATE_LIMIT_PATH = os.getenv("CAL_RATE_LIMIT_PATH")
+
+RATE_LIMITER = RateLimiter(
+    CAL_RATE_LIMIT_READ_RPS, CAL_RATE_LIMIT_READ_BURST,
+    CAL_RATE_LIMIT_WRITE_RPS, CAL_RATE_LIMIT_WRITE_BURST,
+    path=CAL_RATE_LIMIT_PATH
+)
+
+# --- Circuit breakers ---
+# One breaker per endpoint group (first path segment: "bookings", "slots", "event-types"; see
+# circuit.py). After CAL_CIRCUIT_FAILURES consecutive 5xx or transport failures, calls to that
+# group fail fast for CAL_CIRCUIT_RESET seconds instead of each waiting out its timeouts; the
+# read tools then answer from the last data they cached, marked "stale".
+CAL_CIRCUIT_FAILURES = int(os.getenv("CAL_CIRCUIT_FAILURES", "5"))
+CAL_CIRCUIT_RESET = float(os.getenv("CAL_CIRCUIT_RESET", "30"))  # Seconds before a trial call is let through
+CAL_CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CAL_CIRCUIT_HALF_OPEN_CALLS", "1"))  # Trial calls while half-open
+
+CIRCUIT_BREAKERS = CircuitBreakers(CAL_CIRCUIT_FAILURES, CAL_CIRCUIT_RESET, CAL_CIRCUIT_HALF_OPEN_CALLS)
+
+_CAL_HEADERS = {"Content-Type": "application/json"}
+
+# --- Caches ---
+# Event types change rarely. They are cached per API key, invalidated when create_cal_event_type
+# succeeds, and refreshed in the background once older than the TTL (stale-while-revalidate).
+CAL_EVENT_TYPES_TTL = float(os.getenv("CAL_EVENT_TYPES_TTL", "300"))  # Seconds before an entry is refreshed
+CAL_EVENT_TYPES_MAX_STALE = float(os.getenv("CAL_EVENT_TYPES_MAX_STALE", "3600"))  # Seconds a stale entry may still be served
+
+EVENT_TYPES_CACHE = TTLCache(CAL_EVENT_TYPES_TTL, max_stale=CAL_EVENT_TYPES_MAX_STALE)
+
+# Availability is cached per (event type slug, day) for a short time, so moving the requested
+# window only fetches the new days. Booking, cancelling and rescheduling invalidate the affected days.
+CAL_SLOTS_TTL = float(os.getenv("CAL_SLOTS_TTL", "60"))  # Seconds
+
+SLOTS_CACHE = SlotCache(CAL_SLOTS_TTL)
+
+# Bookings are listed page by page; CAL_BOOKINGS_MAX_PAGES bounds a single listing.
+CAL_BOOKINGS_PAGE_SIZE = int(os.getenv("CAL_BOOKINGS_PAGE_SIZE", "100"))
+CAL_BOOKINGS_MAX_PAGES = int(os.getenv("CAL_BOOKINGS_MAX_PAGES", "50"))
+
+# Bookings are also kept in a per-API-key BookingIndex (attendee email -> booking IDs), so repeated
+# "events for X" lookups do not rescan every booking. It is built by the first full listing, updated
+# by book/cancel/reschedule, and rebuilt in the background once older than CAL_BOOKING_INDEX_RECONCILE.
+CAL_BOOKING_INDEX_RECONCILE = float(os.getenv("CAL_BOOKING_INDEX_RECONCILE", "600"))  # Seconds
+
+_booking_indexes = {}
+_booking_indexes_lock = threading.Lock()
+
+# --- Local mirror ---
+# Optional SQLite mirror of bookings and event types (see mirror.py). When CAL_MIRROR_PATH is set,
+# a new process answers the list tools from disk right away, and a background job delta-syncs the
+# mirror every CAL_MIRROR_SYNC_INTERVAL seconds.
+CAL_MIRROR_PATH = os.getenv("CAL_MIRROR_PATH")
+CAL_MIRROR_SYNC_INTERVAL = float(os.getenv("CAL_MIRROR_SYNC_INTERVAL", "300"))  # Seconds
+
+MIRROR = CalMirror(CAL_MIRROR_PATH) if CAL_MIRROR_PATH else None
+
+_mirror_sync_keys = set()
+_mirror_sync_lock = threading.Lock()
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+# httpx.AsyncClient instances are bound to the event loop they were first used on,
+# so the async pool is kept per loop and dropped together with it.
+_async_clients = weakref.WeakKeyDictionary()
+
 def _get_cal_api_key():
     """
     Helper to get the API key from the environment variable.
     """
     return CAL_API_KEY_ENV
 
-def _make_cal_request(endpoint, method="GET", params=None, json_data=None):
+# --- Request timing ---
+# Per-phase timings for metrics.py. A new sync connection stores its connect time in a thread-local,
+# read back by the request that opened it; urllib3 resolves the host name inside connect(), so DNS
+# time is part of it, as is the TLS handshake. The async client reports the same phases through
+# httpx's "trace" extension (_AsyncRequestTimer).
+_connect_timing = threading.local()
+
+class _TimedConnectMixin:
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _connect_timing.seconds = time.perf_counter() - started
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+class _AsyncRequestTimer:
     """
-    Helper function to make requests to the Cal.com API.
-    It retrieves the API key using the callback.
+    httpcore trace callback recording connect time (DNS, TCP and TLS) and time to response headers.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.connect = None
+        self.ttfb = None
+        self._connect_started = None
+
+    async def __call__(self, event_name, info):
+        if event_name == "connection.connect_tcp.started":
+            self._connect_started = time.perf_counter()
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete") and self._connect_started is not None:
+            self.connect = time.perf_counter() - self._connect_started
+        elif event_name == "http11.receive_response_headers.complete":
+            self.ttfb = time.perf_counter() - self.started
+
+def _observe_attempt(group, method, started, status="error", connect=None, ttfb=None, size=None):
+    seconds = time.perf_counter() - started
+    tracing.current_span().add_event("attempt", {
+        "http.status_code": status,
+        "duration_ms": round(seconds * 1000, 3),
+        "connect_ms": round(connect * 1000, 3) if connect is not None else None,
+        "ttfb_ms": round(ttfb * 1000, 3) if ttfb is not None else None,
+        "bytes": size
+    })
+    metrics.CAL_REQUEST_SECONDS.observe(seconds, endpoint=group, method=method, status=status)
+    if connect is not None:
+        metrics.CAL_CONNECT_SECONDS.observe(connect, endpoint=group)
+    if ttfb is not None:
+        metrics.CAL_TTFB_SECONDS.observe(ttfb, endpoint=group)
+    if size is not None:
+        metrics.CAL_RESPONSE_BYTES.observe(size, endpoint=group)
+
+def _get_http_session():
+    """
+    Returns the shared, pooled requests.Session used for all Cal.com calls.
+    It is created lazily on first use. With pool_block enabled, callers wait for a free
+    connection instead of opening more than CAL_HTTP_POOL_MAXSIZE connections per host.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                adapter = _TimedHTTPAdapter(
+                    pool_connections=CAL_HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=CAL_HTTP_POOL_MAXSIZE,
+                    pool_block=CAL_HTTP_POOL_BLOCK,
+                    max_retries=0
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Connection": "keep-alive"})
+                _http_session = session
+    return _http_session
+
+def _get_async_http_client():
+    """
+    Returns the pooled httpx.AsyncClient for the running event loop, creating it on first use.
+    It uses the same pool size and timeouts as the sync session.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=CAL_HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=CAL_HTTP_POOL_MAXSIZE,
+                keepalive_expiry=CAL_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(CAL_HTTP_READ_TIMEOUT, connect=CAL_HTTP_CONNECT_TIMEOUT),
+            headers={"Connection": "keep-alive"}
+        )
+        _async_clients[loop] = client
+    return client
+
+def _build_cal_request(endpoint, params=None):
+    """
+    Helper that returns the full URL and query parameters (including the API key) for a Cal.com call.
+    Returns (None, None) when the API key is not set.
     """
     api_key = _get_cal_api_key()
     if not api_key:
+        return None, None
+    params = dict(params or {})
+    params['apiKey'] = api_key
+    return f"{CAL_API_BASE_URL}{endpoint}", params
+
+def _retry_after_seconds(value):
+    """
+    Parses a Retry-After header (delay in seconds or an HTTP date). Returns None if absent or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def _retry_delay(method, attempt, deadline, status_code=None, retry_after=None, not_sent=False):
+    """
+    Returns how long to wait before retrying a failed Cal.com request, or None to give up.
+    GET and DELETE are retried on 429, 5xx gateway errors and any transport error. Writes are
+    only retried when the request cannot have been processed: on 429, or when it was never sent
+    (the connection could not be opened). The wait is capped exponential backoff with full
+    jitter, or the server's Retry-After, and never runs past the request's retry budget.
+    """
+    if attempt >= CAL_HTTP_RETRIES:
+        return None
+    idempotent = method.upper() in ("GET", "HEAD", "DELETE")
+    if status_code is not None:
+        if status_code != 429 and not (idempotent and status_code in CAL_HTTP_RETRY_STATUSES):
+            return None
+    elif not (idempotent or not_sent):
+        return None
+
+    delay = _retry_after_seconds(retry_after)
+    if delay is None:
+        delay = random.uniform(0, min(CAL_HTTP_BACKOFF_MAX, CAL_HTTP_BACKOFF_BASE * 2 ** attempt))
+    # Leave time for at least a connect after waiting; otherwise fail now rather than later.
+    if time.monotonic() + delay + CAL_HTTP_CONNECT_TIMEOUT > deadline:
+        return None
+    return delay
+
+def _attempt_read_timeout(deadline):
+    """
+    Read timeout of the next attempt: CAL_HTTP_READ_TIMEOUT, shortened to what is left of the retry budget.
+    """
+    return max(0.1, min(CAL_HTTP_READ_TIMEOUT, deadline - time.monotonic()))
+
+_RATE_LIMITED_ERROR = "Request error: too many Cal.com requests in flight; the client-side rate limit could not admit this one in time."
+
+def _request_kind(method):
+    return READ if method.upper() in ("GET", "HEAD") else WRITE
+
+def _on_rate_limited(kind, status_code, retry_after):
+    """
+    After a 429, holds back every caller of the same kind for the server's Retry-After.
+    """
+    if status_code == 429:
+        RATE_LIMITER.penalize(kind, _retry_after_seconds(retry_after) or CAL_HTTP_BACKOFF_BASE)
+
+def _endpoint_group(endpoint):
+    return endpoint.split("/", 1)[0]
+
+def _circuit_open_error(group, breaker):
+    """
+    The structured error returned without calling Cal.com while `group`'s circuit is open.
+    """
+    retry_in = round(breaker.retry_in())
+    return {
+        "error": f"Cal.com is not responding to {group} requests; not calling it again for {retry_in} seconds.",
+        "circuitOpen": True,
+        "retryIn": retry_in
+    }
+
+def _record_outcome(breaker, status_code=None, failed=False):
+    """
+    Counts 5xx responses and transport failures against the circuit; any other answer,
+    including a 4xx, shows Cal.com is up.
+    """
+    if failed or (status_code is not None and status_code >= 500):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+def _trace_result(span, response):
+    span.set_attributes({
+        "cal.error": "error" in response,
+        "cal.circuit_open": response.get("circuitOpen", False)
+    })
+
+def _make_cal_request(endpoint, method="GET", params=None, json_data=None, schema=None):
+    """
+    Helper function to make requests to the Cal.com API.
+    It retrieves the API key using the callback.
+    Transient failures are retried (see _retry_delay) before an error is returned,
+    and calls fail fast while the endpoint group's circuit is open.
+    Each call is traced as a "cal.request" span, with one event per attempt, and each response
+    is added to the turn being recorded, if any (see recorder.py).
+    Responses are parsed with fastjson; `schema` selects a typed, compact decoding (see fastjson.loads).
+    """
+    with tracing.span("cal.request", **{"cal.endpoint": endpoint, "http.method": method}) as span:
+        response = _send_cal_request(endpoint, method, params, json_data, schema)
+        _trace_result(span, response)
+        return response
+
+def _send_cal_request(endpoint, method, params, json_data, schema):
+    url, params = _build_cal_request(endpoint, params)
+    if url is None:
         return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
 
-    if params is None:
-        params = {}
-    params['apiKey'] = api_key
-    url = f"{CAL_API_BASE_URL}{endpoint}"
-    headers = {"Content-Type": "application/json"}
+    deadline = time.monotonic() + CAL_HTTP_RETRY_BUDGET
+    kind = _request_kind(method)
+    group = _endpoint_group(endpoint)
+    breaker = CIRCUIT_BREAKERS.get(group)
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            return _circuit_open_error(group, breaker)
+        if not RATE_LIMITER.acquire(kind, timeout=deadline - time.monotonic()):
+            breaker.release()
+            return {"error": _RATE_LIMITED_ERROR}
+        _connect_timing.seconds = None
+        started = time.perf_counter()
+        try:
+            response = _get_http_session().request(
+                method, url, params=params, json=json_data, headers=_CAL_HEADERS,
+                timeout=(CAL_HTTP_CONNECT_TIMEOUT, _attempt_read_timeout(deadline))
+            )
+            _observe_attempt(group, method, started, response.status_code, _connect_timing.seconds,
+                             response.elapsed.total_seconds(), len(response.content))
+            recorder.record_cal_exchange(method, endpoint, params, json_data, response, time.perf_counter() - started)
+            _record_outcome(breaker, response.status_code)
+            response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
+
+            if response.status_code == 204:
+                return {"message": "Operation successful, no content returned."}
+
+            return fastjson.loads(response.content, schema)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None:
+                return {"error": f"HTTP error: {e}"}
+            delay = _retry_delay(method, attempt, deadline, status_code=e.response.status_code,
+                                 retry_after=e.response.headers.get("Retry-After"))
+            _on_rate_limited(kind, e.response.status_code, e.response.headers.get("Retry-After"))
+            if delay is None:
+                return {"error": f"HTTP error: {e.response.status_code} - {e.response.text}"}
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _observe_attempt(group, method, started, connect=_connect_timing.seconds)
+            _record_outcome(breaker, failed=True)
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            not_sent = isinstance(e, requests.exceptions.ConnectTimeout) or isinstance(reason, NewConnectionError)
+            delay = _retry_delay(method, attempt, deadline, not_sent=not_sent)
+            if delay is None:
+                return {"error": f"Request error: {e}"}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            breaker.release()
+            return {"error": f"Request error: {e}"}
+        metrics.CAL_RETRIES.inc(endpoint=group, method=method)
+        time.sleep(delay)
+        attempt += 1
+
+async def _make_cal_request_async(endpoint, method="GET", params=None, json_data=None, schema=None):
+    """
+    Async counterpart of _make_cal_request, using the pooled httpx.AsyncClient.
+    Returns the same response and error shapes, after the same retries, behind the same circuits.
+    """
+    with tracing.span("cal.request", **{"cal.endpoint": endpoint, "http.method": method}) as span:
+        response = await _send_cal_request_async(endpoint, method, params, json_data, schema)
+        _trace_result(span, response)
+        return response
+
+async def _send_cal_request_async(endpoint, method, params, json_data, schema):
+    url, params = _build_cal_request(endpoint, params)
+    if url is None:
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
+    deadline = time.monotonic() + CAL_HTTP_RETRY_BUDGET
+    kind = _request_kind(method)
+    group = _endpoint_group(endpoint)
+    breaker = CIRCUIT_BREAKERS.get(group)
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            return _circuit_open_error(group, breaker)
+        if not await RATE_LIMITER.aacquire(kind, timeout=deadline - time.monotonic()):
+            breaker.release()
+            return {"error": _RATE_LIMITED_ERROR}
+        timer = _AsyncRequestTimer()
+        try:
+            response = await _get_async_http_client().request(
+                method, url, params=params, json=json_data, headers=_CAL_HEADERS,
+                timeout=httpx.Timeout(_attempt_read_timeout(deadline), connect=CAL_HTTP_CONNECT_TIMEOUT),
+                extensions={"trace": timer}
+            )
+            _observe_attempt(group, method, timer.started, response.status_code, timer.connect, timer.ttfb, len(response.content))
+            recorder.record_cal_exchange(method, endpoint, params, json_data, response, time.perf_counter() - timer.started)
+            _record_outcome(breaker, response.status_code)
+            response.raise_for_status() # Raise an HTTPStatusError for bad responses (4xx or 5xx)
+
+            if response.status_code == 204:
+                return {"message": "Operation successful, no content returned."}
+
+            return fastjson.loads(response.content, schema)
+        except httpx.HTTPStatusError as e:
+            delay = _retry_delay(method, attempt, deadline, status_code=e.response.status_code,
+                                 retry_after=e.response.headers.get("Retry-After"))
+            _on_rate_limited(kind, e.response.status_code, e.response.headers.get("Retry-After"))
+            if delay is None:
+                return {"error": f"HTTP error: {e.response.status_code} - {e.response.text}"}
+        except httpx.TransportError as e:
+            _observe_attempt(group, method, timer.started, connect=timer.connect)
+            _record_outcome(breaker, failed=True)
+            # Connect and pool errors mean the request was never sent.
+            not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+            delay = _retry_delay(method, attempt, deadline, not_sent=not_sent)
+            if delay is None:
+                return {"error": f"Request error: {e}"}
+        except (httpx.HTTPError, ValueError) as e:
+            breaker.release()
+            return {"error": f"Request error: {e}"}
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        metrics.CAL_RETRIES.inc(endpoint=group, method=method)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+# --- Tool flows ---
+# The logic of each tool is written once, as a generator that yields the Cal.com calls it
+# needs (built with _cal_call) and is sent back each parsed response. _run_flow drives a flow
+# with the sync session and _arun_flow with the async client, so the sync @tool functions and
+# their async variants cannot drift apart.
+
+def _cal_call(endpoint, method="GET", params=None, json_data=None, schema=None):
+    """
+    Describes a single Cal.com request, as keyword arguments for _make_cal_request.
+    """
+    return {"endpoint": endpoint, "method": method, "params": params, "json_data": json_data, "schema": schema}
 
+def _run_flow(flow):
+    """
+    Runs a tool flow to completion with the sync HTTP session and returns its result.
+    """
     try:
-        response = requests.request(method, url, params=params, json=json_data, headers=headers)
-        response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-
-        if response.status_code == 204:
-            return {"message": "Operation successful, no content returned."}
-        
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        error_detail = e.response.text if e.response is not None else "No response body"
-        return {"error": f"HTTP error: {e.response.status_code} - {error_detail}"}
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Request error: {e}"}
+        call = next(flow)
+        while True:
+            call = flow.send(_make_cal_request(**call))
+    except StopIteration as stop:
+        return stop.value
 
-@tool
-def list_event_types() -> str:
+async def _arun_flow(flow):
     """
-    Lists the available event types for the Cal.com account associated with the API key.
-    Useful for understanding what kind of events can be booked.
-    Returns a JSON string of event types, including their ID, title, and slug.
+    Runs a tool flow to completion with the async HTTP client and returns its result.
     """
-    api_key = _get_cal_api_key()
-    if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    response = _make_cal_request("event-types")
-    if "error" in response:
-        return json.dumps(response)
-    
+    try:
+        call = next(flow)
+        while True:
+            call = flow.send(await _make_cal_request_async(**call))
+    except StopIteration as stop:
+        return stop.value
+
+def _summarize_event_types(response):
     event_types_summary = [{"id": et.get("id"), "title": et.get("title"), "slug": et.get("slug")} for et in response.get("eventTypes", [])]
-    return json.dumps({"eventTypes": event_types_summary})
+    return {"eventTypes": event_types_summary}
 
-@tool
-def get_available_slots(event_type_slug: str, start_date_str: str, end_date_str: str) -> str:
+def _refresh_event_types(api_key):
     """
-    Checks for available slots for a specific event type within a date range.
-    The start_date_str and end_date_str should be in 'YYYY-MM-DD' format.
-    Returns a JSON string of available slots.
+    Re-fetches the event types for `api_key` into EVENT_TYPES_CACHE. Runs on a background thread.
+    """
+    try:
+        generation = EVENT_TYPES_CACHE.generation(api_key)
+        response = _make_cal_request("event-types", schema="event_types")
+        if "error" not in response:
+            _store_event_types(api_key, _summarize_event_types(response), generation)
+    finally:
+        EVENT_TYPES_CACHE.end_refresh(api_key)
+
+def _store_event_types(api_key, event_types, generation):
+    if EVENT_TYPES_CACHE.set(api_key, event_types, generation=generation) and MIRROR is not None:
+        MIRROR.replace_event_types(account_for(api_key), event_types["eventTypes"])
+
+def _start_event_types_refresh(api_key):
+    if EVENT_TYPES_CACHE.start_refresh(api_key):
+        threading.Thread(target=_refresh_event_types, args=(api_key,), daemon=True).start()
+
+def _stale(result):
+    """
+    Marks a read result served from old cached data because the endpoint's circuit is open.
     """
+    return {**result, "stale": True, "warning": "Cal.com is unavailable; this is the last known data and may be out of date."}
+
+def _list_event_types_flow():
+    api_key = _get_cal_api_key()
+    if not api_key:
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
+    _ensure_mirror_sync(api_key)
+    cached = EVENT_TYPES_CACHE.get(api_key)
+    if cached is not None:
+        tracing.set_attributes(**{"cache.source": "cache", "cache.fresh": cached.fresh})
+        if not cached.fresh:
+            _start_event_types_refresh(api_key)
+        return cached.value
+
+    # A warm mirror answers right away; like a stale cache entry, it is refreshed in the background.
+    mirrored = MIRROR.event_types(account_for(api_key)) if MIRROR is not None else None
+    if mirrored is not None:
+        tracing.set_attributes(**{"cache.source": "mirror"})
+        _start_event_types_refresh(api_key)
+        return {"eventTypes": mirrored}
+
+    tracing.set_attributes(**{"cache.source": "api"})
+
+    generation = EVENT_TYPES_CACHE.generation(api_key)
+    response = yield _cal_call("event-types", schema="event_types")
+    if "error" in response:
+        last_known = EVENT_TYPES_CACHE.last_known(api_key) if response.get("circuitOpen") else None
+        return _stale(last_known) if last_known is not None else response
+
+    event_types = _summarize_event_types(response)
+    _store_event_types(api_key, event_types, generation)
+    return event_types
+
+def _get_available_slots_flow(event_type_slug, start_date_str, end_date_str):
     api_key = _get_cal_api_key()
     if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
     try:
         start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
     except ValueError:
-        return json.dumps({"error": "Invalid date format for start_date_str or end_date_str. Please use YYYY-MM-DD."})
+        return {"error": "Invalid date format for start_date_str or end_date_str. Please use YYYY-MM-DD."}
+    if end_date < start_date:
+        return {"error": f"end_date_str ({end_date_str}) is before start_date_str ({start_date_str})."}
+
+    days = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+    cached, missing = SLOTS_CACHE.get_days(api_key, event_type_slug, days)
+    slots = {day.isoformat(): day_slots for day, day_slots in cached.items()}
+    stale = False
+    tracing.set_attributes(**{"cache.days_hit": len(cached), "cache.days_missed": len(missing)})
+
+    # Only the missing sub-ranges are fetched; each run of consecutive days is one request.
+    for run_start, run_end in contiguous_runs(missing):
+        run_days = [day for day in missing if run_start <= day <= run_end]
+        generations = SLOTS_CACHE.generations(api_key, run_days)
+        params = {
+            "eventType": event_type_slug,
+            "startDate": run_start.isoformat(),
+            "endDate": run_end.isoformat()
+        }
+        response = yield _cal_call("slots", params=params)
+        if "error" in response:
+            last_known = SLOTS_CACHE.last_known_days(api_key, event_type_slug, run_days) if response.get("circuitOpen") else {}
+            if len(last_known) < len(run_days):
+                return response
+            slots.update((day.isoformat(), day_slots) for day, day_slots in last_known.items())
+            stale = True
+            continue
+
+        fetched = response.get("slots") or {}
+        SLOTS_CACHE.set_days(api_key, event_type_slug, {day: fetched.get(day.isoformat(), []) for day in run_days}, generations)
+        slots.update(fetched)
+
+    result = {"slots": {day: slots[day] for day in sorted(slots) if slots[day]}}
+    return _stale(result) if stale else result
 
-    params = {
-        "eventType": event_type_slug,
-        "startDate": start_date.isoformat(),
-        "endDate": end_date.isoformat()
+def _booking_days(*times_iso):
+    """
+    Returns the calendar days touched by the given ISO 8601 times, both in their own offset
+    and in UTC (slot days may be keyed either way). Unparseable times are ignored.
+    """
+    days = set()
+    for time_iso in times_iso:
+        try:
+            moment = isoparse(time_iso)
+        except (TypeError, ValueError):
+            continue
+        days.add(moment.date())
+        if moment.tzinfo is not None:
+            days.add(moment.astimezone(timezone.utc).date())
+    return days
+
+def _get_booking_index(api_key):
+    with _booking_indexes_lock:
+        index = _booking_indexes.get(api_key)
+        if index is None:
+            index = _booking_indexes[api_key] = BookingIndex()
+        return index
+
+def _booking_record(booking):
+    """
+    Compact copy of a raw Cal.com booking, as stored in the BookingIndex.
+    """
+    return {
+        "id": booking.get("id"),
+        "uid": booking.get("uid"),
+        "title": booking.get("title"),
+        "description": booking.get("description"),
+        "startTime": booking.get("startTime"),
+        "endTime": booking.get("endTime"),
+        "status": booking.get("status"),
+        "eventTypeId": booking.get("eventTypeId"),
+        "attendees": [{"email": a.get("email"), "name": a.get("name")} for a in booking.get("attendees") or []]
     }
-    response = _make_cal_request("slots", params=params)
-    return json.dumps(response)
 
-@tool
-def book_cal_event(event_type_id: int, start_time_iso: str, end_time_iso: str, email: str, name: str, title: str, description: str = "") -> str:
+def _store_booking(api_key, booking):
     """
-    Books a new event in Cal.com.
-    event_type_id: The ID of the event type to book. You can obtain this from the `list_event_types` tool.
-    start_time_iso: The start time of the event in ISO 8601 format (e.g., '2024-06-15T10:00:00Z' for UTC or '2024-06-15T10:00:00-07:00' for a specific offset).
-    end_time_iso: The end time of the event in ISO 8601 format (e.g., '2024-06-15T11:00:00Z' for UTC or '2024-06-15T11:00:00-07:00' for a specific offset).
-    email: The email address of the person booking the event (the attendee).
-    name: The full name of the person booking the event (the attendee).
-    title: The title or brief subject of the event.
-    description: (Optional) A detailed description for the event.
-    Returns a JSON string with the booking details upon success or an error message.
+    Writes a booking through to the BookingIndex and, when enabled, the mirror.
     """
+    if booking.get("id") is None:
+        return
+    record = _booking_record(booking)
+    _get_booking_index(api_key).upsert(record)
+    if MIRROR is not None:
+        MIRROR.upsert_booking(account_for(api_key), record)
+
+def _mark_booking_cancelled(api_key, booking_id):
+    _get_booking_index(api_key).update(booking_id, status="CANCELLED")
+    if MIRROR is not None:
+        MIRROR.update_booking(account_for(api_key), booking_id, status="CANCELLED")
+
+def _book_cal_event_flow(event_type_id, start_time_iso, end_time_iso, email, name, title, description="", reschedule_uid=None):
     api_key = _get_cal_api_key()
     if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
     payload = {
         "eventTypeId": event_type_id,
         "start": start_time_iso,
@@ -121,125 +691,503 @@ def book_cal_event(event_type_id: int, start_time_iso: str, end_time_iso: str, e
         },
         "language": "en"
     }
+    if reschedule_uid:
+        # Cal.com books the new slot and cancels the original booking in the same request.
+        payload["rescheduleUid"] = reschedule_uid
 
-    response = _make_cal_request("bookings", method="POST", json_data=payload)
-    return json.dumps(response)
+    response = yield _cal_call("bookings", method="POST", json_data=payload)
+    if "error" not in response:
+        SLOTS_CACHE.invalidate_days(api_key, _booking_days(start_time_iso, end_time_iso))
+        # The booking response may omit fields we already know from the request.
+        _store_booking(api_key, {
+            "startTime": start_time_iso,
+            "endTime": end_time_iso,
+            "title": title,
+            "description": description,
+            "eventTypeId": event_type_id,
+            **{k: v for k, v in response.items() if v is not None},
+            "attendees": response.get("attendees") or [{"email": email, "name": name}]
+        })
+    return response
 
-@tool
-def list_cal_events(email: str = None) -> str:
+def _summarize_booking(booking):
+    attendee_emails = [a.get("email") for a in booking.get("attendees", []) if a.get("email")]
+    return {
+        "id": booking.get("id"),
+        "title": booking.get("title"),
+        "description": booking.get("description"),
+        "startTime": _compact_time(booking.get("startTime")),
+        "endTime": _compact_time(booking.get("endTime")),
+        "attendees": attendee_emails
+    }
+
+def _booking_matches(booking, email=None, start_date=None, end_date=None, status=None):
     """
-    Retrieves a list of scheduled events for the Cal.com account.
-    If an 'email' is provided, it filters events by that attendee's email.
-    If no email is provided, it returns all accessible scheduled events.
-    Returns a JSON string containing a summary of scheduled events.
+    Client-side filter for a raw booking. Also applied to server-filtered pages, in case the
+    API ignores a filter.
+    """
+    if email:
+        email = email.lower()
+        if not any((a.get("email") or "").lower() == email for a in booking.get("attendees", [])):
+            return False
+    if status and (booking.get("status") or "").lower() != status.lower():
+        return False
+    if start_date or end_date:
+        try:
+            booking_date = isoparse(booking.get("startTime")).date()
+        except (TypeError, ValueError):
+            return False
+        if (start_date and booking_date < start_date) or (end_date and booking_date > end_date):
+            return False
+    return True
+
+def _walk_bookings_flow(api_key, email=None, start_date=None, end_date=None, status=None, limit=None, records=None):
+    """
+    Pages through /bookings and returns ({"bookings": [...]} or an error, complete), where
+    `complete` is True when every page was read. A listing cut off after CAL_BOOKINGS_MAX_PAGES
+    pages is marked "truncated": true. When `records` is a list, a compact record of every
+    booking seen (matching or not) is appended to it, for rebuilding the BookingIndex.
+    """
+    # The attendee filter and pagination are pushed to the API. Date range and status are
+    # checked page by page, so only the matching summaries are held in memory.
+    params = {"take": CAL_BOOKINGS_PAGE_SIZE}
+    if email:
+        params["attendeeEmail"] = email
+
+    summarized_bookings = []
+    previous_first_id = None
+    for page in range(1, CAL_BOOKINGS_MAX_PAGES + 1):
+        response = yield _cal_call("bookings", params={**params, "page": page}, schema="bookings")
+
+        if "error" in response:
+            return response, False
+
+        bookings = response.get("bookings", [])
+        if not bookings:
+            return {"bookings": summarized_bookings}, True
+        # An API that ignores `page` returns the same page again; stop instead of looping.
+        if page > 1 and bookings[0].get("id") == previous_first_id:
+            return {"bookings": summarized_bookings}, True
+        previous_first_id = bookings[0].get("id")
+
+        for booking in bookings:
+            if records is not None:
+                records.append(_booking_record(booking))
+            if not _booking_matches(booking, email, start_date, end_date, status):
+                continue
+            if records is None:
+                _store_booking(api_key, booking)
+            summarized_bookings.append(_summarize_booking(booking))
+            # One match past the limit shows there are more.
+            if limit and len(summarized_bookings) > limit:
+                return {"bookings": summarized_bookings[:limit], "hasMore": True}, False
+
+        if len(bookings) < CAL_BOOKINGS_PAGE_SIZE:
+            return {"bookings": summarized_bookings}, True
+
+    return {"bookings": summarized_bookings, "truncated": True}, False
+
+def _rebuild_booking_index(api_key, index):
+    """
+    Reloads `index` from a full listing. Runs on a background thread; the caller must have
+    called index.begin_rebuild().
+    """
+    records, result, complete = [], {}, False
+    try:
+        result, complete = _run_flow(_walk_bookings_flow(api_key, records=records))
+    finally:
+        _finish_bookings_snapshot(api_key, index, records, result, complete)
+
+def _finish_bookings_snapshot(api_key, index, records, result, complete):
     """
+    Loads a listing into the index and delta-applies it to the mirror, if it read every page or
+    stopped at the page limit (then the index is marked truncated and the mirror keeps bookings
+    it did not see). Failed or limit-cut listings abandon the rebuild.
+    """
+    truncated = result.get("truncated", False)
+    if not (complete or truncated) or "error" in result:
+        records = None
+    index.finish_rebuild(records, truncated)
+    if records is not None and MIRROR is not None:
+        MIRROR.apply_bookings_snapshot(account_for(api_key), records, complete=not truncated)
+
+def _start_booking_index_rebuild(api_key):
+    index = _get_booking_index(api_key)
+    if index.begin_rebuild():
+        threading.Thread(target=_rebuild_booking_index, args=(api_key, index), daemon=True).start()
+
+def _mirror_sync_loop(api_key):
+    """
+    Background job that keeps the mirror fresh: every CAL_MIRROR_SYNC_INTERVAL seconds it re-reads
+    all bookings (delta-applied, so unchanged rows are not rewritten) and the event types.
+    """
+    account = account_for(api_key)
+    while True:
+        last_synced = MIRROR.last_synced(account, "bookings")
+        if last_synced is not None and time.time() - last_synced < CAL_MIRROR_SYNC_INTERVAL:
+            time.sleep(CAL_MIRROR_SYNC_INTERVAL - (time.time() - last_synced))
+            continue
+        try:
+            index = _get_booking_index(api_key)
+            if index.begin_rebuild():
+                _rebuild_booking_index(api_key, index)
+            if EVENT_TYPES_CACHE.start_refresh(api_key):
+                _refresh_event_types(api_key)
+        except Exception:
+            pass  # Keep the job alive; the next round retries.
+        time.sleep(CAL_MIRROR_SYNC_INTERVAL)
+
+def _ensure_mirror_sync(api_key):
+    if MIRROR is None:
+        return
+    with _mirror_sync_lock:
+        if api_key in _mirror_sync_keys:
+            return
+        _mirror_sync_keys.add(api_key)
+    threading.Thread(target=_mirror_sync_loop, args=(api_key,), daemon=True).start()
+
+def _list_cal_events_flow(email=None, start_date_str=None, end_date_str=None, status=None, limit=None):
     api_key = _get_cal_api_key()
     if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    
-    response = _make_cal_request("bookings") 
-    
-    if "error" in response:
-        return json.dumps(response)
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
+    try:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
+    except ValueError:
+        return {"error": "Invalid date format for start_date_str or end_date_str. Please use YYYY-MM-DD."}
 
-    bookings = response.get("bookings", [])
-    
-    filtered_bookings = []
+    _ensure_mirror_sync(api_key)
+    index = _get_booking_index(api_key)
+    # A truncated index may miss some of an attendee's bookings; those lookups use the filtered API.
+    if index.ready and not (email and index.truncated):
+        tracing.set_attributes(**{"cache.source": "index"})
+        if index.age() > CAL_BOOKING_INDEX_RECONCILE:
+            _start_booking_index_rebuild(api_key)
+        summarized_bookings = []
+        for record in index.find_by_email(email) if email else index.all():
+            if not _booking_matches(record, None, start_date, end_date, status):
+                continue
+            if limit and len(summarized_bookings) >= limit:
+                return {"bookings": summarized_bookings, "hasMore": True}
+            summarized_bookings.append(_summarize_booking(record))
+        if index.truncated:
+            return {"bookings": summarized_bookings, "truncated": True}
+        return {"bookings": summarized_bookings}
+
+    account = account_for(api_key)
+    if MIRROR is not None and MIRROR.last_synced(account, "bookings") is not None:
+        # Warm start: answer from the mirror's SQL indexes while the in-memory index is built.
+        tracing.set_attributes(**{"cache.source": "mirror"})
+        if not index.ready or index.age() > CAL_BOOKING_INDEX_RECONCILE:
+            _start_booking_index_rebuild(api_key)
+        records = MIRROR.find_bookings(account, email, start_date, end_date, status, limit + 1 if limit else None)
+        summarized_bookings = [_summarize_booking(record) for record in records[:limit or None]]
+        if limit and len(records) > limit:
+            return {"bookings": summarized_bookings, "hasMore": True}
+        return {"bookings": summarized_bookings}
+
+    tracing.set_attributes(**{"cache.source": "api"})
     if email:
-        for booking in bookings:
-            attendees = booking.get("attendees", [])
-            for attendee in attendees:
-                if attendee.get("email", "").lower() == email.lower():
-                    filtered_bookings.append(booking)
-                    break
+        # Answer this lookup through the filtered API and build the index for the next ones
+        # (a truncated index is only rebuilt on the reconcile interval).
+        if not index.ready or index.age() > CAL_BOOKING_INDEX_RECONCILE:
+            _start_booking_index_rebuild(api_key)
+        result, _ = yield from _walk_bookings_flow(api_key, email, start_date, end_date, status, limit)
+        return result
+
+    # An unfiltered listing reads every booking anyway, so it also builds the index.
+    records = [] if index.begin_rebuild() else None
+    result, complete = {}, False
+    try:
+        result, complete = yield from _walk_bookings_flow(api_key, None, start_date, end_date, status, limit, records)
+    finally:
+        if records is not None:
+            _finish_bookings_snapshot(api_key, index, records, result, complete)
+    return result
+
+def _cancel_cal_event_flow(booking_id):
+    api_key = _get_cal_api_key()
+    if not api_key:
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
+    response = yield _cal_call(f"bookings/{booking_id}", method="DELETE")
+
+    if "error" in response:
+        return response
+
+    index = _get_booking_index(api_key)
+    record = index.get(booking_id)
+    if record is not None:
+        SLOTS_CACHE.invalidate_days(api_key, _booking_days(record.get("startTime"), record.get("endTime")))
     else:
-        filtered_bookings = bookings
+        SLOTS_CACHE.invalidate(api_key)
+    _mark_booking_cancelled(api_key, booking_id)
 
-    summarized_bookings = []
-    for booking in filtered_bookings:
-        start_time = booking.get("startTime")
-        end_time = booking.get("endTime")
-        title = booking.get("title")
-        description = booking.get("description")
-        id_ = booking.get("id")
-        attendee_emails = [a.get("email") for a in booking.get("attendees", []) if a.get("email")]
-        
-        summarized_bookings.append({
-            "id": id_,
-            "title": title,
-            "description": description,
-            "startTime": start_time,
-            "endTime": end_time,
-            "attendees": attendee_emails
-        })
-        
-    return json.dumps({"bookings": summarized_bookings})
+    return {"status": "success", "message": f"Event with ID {booking_id} cancelled successfully."}
+
+def _reschedule_cal_event_flow(booking_id, new_start_time_iso, new_end_time_iso):
+    api_key = _get_cal_api_key()
+    if not api_key:
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
+
+    # The booking index usually has everything needed, which saves fetching the booking first.
+    details = _get_booking_index(api_key).get(booking_id)
+    if not details or not details.get("uid") or not details.get("eventTypeId") or not details.get("attendees"):
+        single_booking_response = yield _cal_call(f"bookings/{booking_id}")
+        if "error" in single_booking_response or not single_booking_response.get("booking"):
+            return {"error": f"Could not fetch full details for event with ID {booking_id} for rescheduling."}
+        _store_booking(api_key, single_booking_response["booking"])
+        details = _booking_record(single_booking_response["booking"])
+
+    event_type_id = details.get("eventTypeId")
+    attendee_email = details.get("attendees")[0].get("email") if details.get("attendees") else None
+    attendee_name = details.get("attendees")[0].get("name") if details.get("attendees") else None
+
+    if not event_type_id or not attendee_email or not attendee_name:
+        return {"error": "Missing crucial information (event type ID, attendee email, or attendee name) from original booking to reschedule."}
+
+    title = details.get("title")
+    description = details.get("description") or ""
+    old_days = _booking_days(details.get("startTime"), details.get("endTime"))
+
+    if details.get("uid"):
+        # Native reschedule: a single booking request carrying the original booking's rescheduleUid.
+        # If it fails, the original booking is left untouched.
+        new_booking_response = yield from _book_cal_event_flow(event_type_id, new_start_time_iso, new_end_time_iso, attendee_email, attendee_name, title, description, reschedule_uid=details["uid"])
+        if "error" in new_booking_response:
+            return {"error": f"Failed to reschedule event with ID {booking_id}: {new_booking_response.get('error', 'Unknown error')}. The original event was not changed."}
+
+        if new_booking_response.get("fromReschedule"):
+            _mark_booking_cancelled(api_key, booking_id)
+            SLOTS_CACHE.invalidate_days(api_key, old_days)
+        else:
+            # The API booked the new slot but did not apply rescheduleUid; cancel the original explicitly.
+            cancel_status = yield from _cancel_cal_event_flow(booking_id)
+            if cancel_status.get("status") != "success":
+                return {"error": f"New event booked, but failed to cancel the original event with ID {booking_id}: {cancel_status.get('error', 'Unknown error')}. Please cancel it manually.", "new_booking": new_booking_response}
+
+        return {"status": "success", "message": f"Event {booking_id} successfully rescheduled.", "new_booking": new_booking_response}
+
+    # Fallback without a booking uid: cancel the old event, then book the new one.
+    cancel_status = yield from _cancel_cal_event_flow(booking_id)
+    if cancel_status.get("status") != "success":
+        return {"error": f"Failed to cancel old event with ID {booking_id} during reschedule: {cancel_status.get('error', 'Unknown error')}"}
+
+    new_booking_response = yield from _book_cal_event_flow(event_type_id, new_start_time_iso, new_end_time_iso, attendee_email, attendee_name, title, description)
+
+    if "error" in new_booking_response:
+        return {"error": f"Event cancelled, but failed to book new event during reschedule: {new_booking_response.get('error', 'Unknown error')}. Please try booking a new event manually."}
+
+    return {"status": "success", "message": f"Event {booking_id} successfully rescheduled.", "new_booking": new_booking_response}
+
+def _create_cal_event_type_flow(title, slug, length, description="", hidden=False):
+    api_key = _get_cal_api_key()
+    if not api_key:
+        return {"error": "Cal.com API Key is not set in environment variables. Please set CAL_API_KEY in your .env file."}
+
+    payload = {
+        "title": title,
+        "slug": slug,
+        "length": length, # Duration in minutes
+        "description": description,
+        "hidden": hidden
+    }
+
+    response = yield _cal_call("event-types", method="POST", json_data=payload)
+    if "error" not in response:
+        # The next listing must come from the API, so that it includes the new type.
+        EVENT_TYPES_CACHE.invalidate(api_key)
+        if MIRROR is not None:
+            MIRROR.expire(account_for(api_key), "event_types")
+    return response
+
+# --- Compact tool outputs ---
+# What the tools return is fed back to the LLM on every later agent step, so raw Cal.com responses
+# are projected to the fields the agent needs, with short UTC times and slots collapsed into ranges.
+# bench/token_report.py measures the savings on the recorded responses in fixtures/cal_responses/.
+
+CAL_TOOL_MAX_SLOT_RANGES = int(os.getenv("CAL_TOOL_MAX_SLOT_RANGES", "40"))  # Slot ranges returned before "moreAvailable"
+
+def _parse_time(value):
+    try:
+        moment = isoparse(value)
+    except (TypeError, ValueError):
+        return None
+    return moment.astimezone(timezone.utc) if moment.tzinfo is not None else moment
+
+def _compact_time(value):
+    """
+    "2024-06-15T16:00:00.000Z" -> "2024-06-15T16:00Z". Values that are not ISO times are returned unchanged.
+    """
+    moment = _parse_time(value)
+    if moment is None:
+        return value
+    text = moment.strftime("%Y-%m-%dT%H:%M:%S" if moment.second else "%Y-%m-%dT%H:%M")
+    return text + ("Z" if moment.tzinfo is not None else "")
+
+def _slot_interval(times_by_day):
+    """
+    The most common gap in minutes between consecutive slot start times, or None for single slots.
+    """
+    gaps = {}
+    for times in times_by_day.values():
+        for previous, current in zip(times, times[1:]):
+            gap = int((current - previous).total_seconds() // 60)
+            if gap > 0:
+                gaps[gap] = gaps.get(gap, 0) + 1
+    return max(gaps, key=lambda gap: (gaps[gap], -gap)) if gaps else None
+
+def _slot_ranges(times, interval):
+    """
+    Collapses sorted start times into "HH:MM-HH:MM" runs (one start every `interval` minutes) and single "HH:MM" times.
+    """
+    runs = []
+    for moment in times:
+        if runs and interval and (moment - runs[-1][1]).total_seconds() == interval * 60:
+            runs[-1][1] = moment
+        else:
+            runs.append([moment, moment])
+    return [first.strftime("%H:%M") if first == last else f"{first.strftime('%H:%M')}-{last.strftime('%H:%M')}" for first, last in runs]
+
+def _compact_slots(result):
+    """
+    {"slots": {day: [{"time": iso}, ...]}} -> {"timeZone": "UTC", "interval": minutes, "slots": {day: ["09:00-11:30", "14:00"]}},
+    capped at CAL_TOOL_MAX_SLOT_RANGES ranges with a "moreAvailable" marker whenever anything is left out.
+    """
+    if "error" in result:
+        return result
+    times_by_day = {}
+    for day, day_slots in result.get("slots", {}).items():
+        times = sorted(moment for moment in (_parse_time(slot.get("time")) for slot in day_slots) if moment is not None)
+        for moment in times:
+            times_by_day.setdefault(moment.date().isoformat(), []).append(moment)
+    interval = _slot_interval(times_by_day)
+
+    compact, shown = {}, 0
+    summary = {"timeZone": "UTC", "interval": interval, "slots": compact}
+    days = sorted(times_by_day)
+    for n, day in enumerate(days):
+        ranges = _slot_ranges(times_by_day[day], interval)
+        if shown + len(ranges) > CAL_TOOL_MAX_SLOT_RANGES:
+            if not compact:
+                compact[day] = ranges[:CAL_TOOL_MAX_SLOT_RANGES]  # Part of the first day rather than nothing
+            # "from" is the first day not shown in full.
+            summary["moreAvailable"] = {"days": len(days) - n, "from": day, "to": days[-1]}
+            break
+        compact[day] = ranges
+        shown += len(ranges)
+    if result.get("stale"):
+        summary.update(stale=True, warning=result["warning"])
+    return summary
+
+def _compact_booking(booking):
+    """
+    The fields of a booking response the agent needs; times are compacted.
+    """
+    if "error" in booking:
+        return booking
+    compact = {
+        "id": booking.get("id"),
+        "uid": booking.get("uid"),
+        "title": booking.get("title"),
+        "startTime": _compact_time(booking.get("startTime")),
+        "endTime": _compact_time(booking.get("endTime")),
+        "status": booking.get("status"),
+        "attendees": [a.get("email") for a in booking.get("attendees") or [] if a.get("email")]
+    }
+    return {k: v for k, v in compact.items() if v not in (None, [])}
+
+def _compact_reschedule(result):
+    if "new_booking" in result:
+        return {**result, "new_booking": _compact_booking(result["new_booking"])}
+    return result
+
+def _tool_json(result):
+    return fastjson.dumps(result)
+
+# --- Tools ---
 
 @tool
+@metrics.timed_tool
+def list_event_types() -> str:
+    """
+    Lists the available event types for the Cal.com account associated with the API key.
+    Useful for understanding what kind of events can be booked.
+    Returns a JSON string of event types, including their ID, title, and slug.
+    """
+    return _tool_json(_run_flow(_list_event_types_flow()))
+
+@tool
+@metrics.timed_tool
+def get_available_slots(event_type_slug: str, start_date_str: str, end_date_str: str) -> str:
+    """
+    Checks for available slots for a specific event type within a date range.
+    The start_date_str and end_date_str should be in 'YYYY-MM-DD' format.
+    Returns a JSON string of available start times per day, in UTC: "09:00-11:30" means a slot
+    starts every `interval` minutes from 09:00 to 11:30. "moreAvailable" lists days left out; ask for them separately.
+    """
+    return _tool_json(_compact_slots(_run_flow(_get_available_slots_flow(event_type_slug, start_date_str, end_date_str))))
+
+@tool
+@metrics.timed_tool
+def book_cal_event(event_type_id: int, start_time_iso: str, end_time_iso: str, email: str, name: str, title: str, description: str = "") -> str:
+    """
+    Books a new event in Cal.com.
+    event_type_id: The ID of the event type to book. You can obtain this from the `list_event_types` tool.
+    start_time_iso: The start time of the event in ISO 8601 format (e.g., '2024-06-15T10:00:00Z' for UTC or '2024-06-15T10:00:00-07:00' for a specific offset).
+    end_time_iso: The end time of the event in ISO 8601 format (e.g., '2024-06-15T11:00:00Z' for UTC or '2024-06-15T11:00:00-07:00' for a specific offset).
+    email: The email address of the person booking the event (the attendee).
+    name: The full name of the person booking the event (the attendee).
+    title: The title or brief subject of the event.
+    description: (Optional) A detailed description for the event.
+    Returns a JSON string with the booking details upon success or an error message.
+    """
+    return _tool_json(_compact_booking(_run_flow(_book_cal_event_flow(event_type_id, start_time_iso, end_time_iso, email, name, title, description))))
+
+@tool
+@metrics.timed_tool
+def list_cal_events(email: str = None, start_date_str: str = None, end_date_str: str = None, status: str = None, limit: int = None) -> str:
+    """
+    Retrieves a list of scheduled events for the Cal.com account.
+    If an 'email' is provided, it filters events by that attendee's email.
+    If no email is provided, it returns all accessible scheduled events.
+    start_date_str / end_date_str: (Optional) Only return events starting within this range, in 'YYYY-MM-DD' format.
+    status: (Optional) Only return events with this status (e.g., 'accepted', 'cancelled', 'pending').
+    limit: (Optional) Stop after this many events; the result then includes "hasMore": true if there are more.
+    A listing cut off at the page limit includes "truncated": true.
+    Returns a JSON string containing a summary of scheduled events.
+    """
+    return _tool_json(_run_flow(_list_cal_events_flow(email, start_date_str, end_date_str, status, limit)))
+
+@tool
+@metrics.timed_tool
 def cancel_cal_event(booking_id: int) -> str:
     """
     Cancels a specific event in Cal.com by its unique booking ID.
     booking_id: The integer ID of the event to cancel. This ID can be obtained from the `list_cal_events` tool.
     Returns a JSON string indicating the success or failure of the cancellation.
     """
-    api_key = _get_cal_api_key()
-    if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    
-    response = _make_cal_request(f"bookings/{booking_id}", method="DELETE")
-    
-    if "error" in response:
-        return json.dumps(response)
-    
-    return json.dumps({"status": "success", "message": f"Event with ID {booking_id} cancelled successfully."})
+    return _tool_json(_run_flow(_cancel_cal_event_flow(booking_id)))
 
 @tool
+@metrics.timed_tool
 def reschedule_cal_event(booking_id: int, new_start_time_iso: str, new_end_time_iso: str) -> str:
     """
-    Reschedules an existing Cal.com event. This process involves two steps:
-    1. Canceling the original event.
-    2. Creating a new event with the same details but updated start and end times.
-    
+    Reschedules an existing Cal.com event to new start and end times, keeping its other details.
+    The original event is cancelled by Cal.com as part of the same booking request; if rescheduling
+    fails, the original event is left unchanged.
+
     booking_id: The integer ID of the event to reschedule. This ID can be obtained from `list_cal_events`.
     new_start_time_iso: The new start time for the event in ISO 8601 format (e.g., '2024-06-15T10:00:00Z' for UTC or '2024-06-15T10:00:00-07:00' for a specific offset).
     new_end_time_iso: The new end time for the event in ISO 8601 format (e.g., '2024-06-15T11:00:00Z' for UTC or '2024-06-15T11:00:00-07:00' for a specific offset).
-    
+
     Returns a JSON string with the details of the new booking upon success or an error message.
     """
-    api_key = _get_cal_api_key()
-    if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."})
-    
-    single_booking_response = _make_cal_request(f"bookings/{booking_id}")
-    if "error" in single_booking_response or not single_booking_response.get("booking"):
-        return json.dumps({"error": f"Could not fetch full details for event with ID {booking_id} for rescheduling."})
-    
-    full_booking_details = single_booking_response["booking"]
-
-    event_type_id = full_booking_details.get("eventTypeId")
-    attendee_email = full_booking_details.get("attendees")[0].get("email") if full_booking_details.get("attendees") else None
-    attendee_name = full_booking_details.get("attendees")[0].get("name") if full_booking_details.get("attendees") else None
-    
-    if not event_type_id or not attendee_email or not attendee_name:
-        return json.dumps({"error": "Missing crucial information (event type ID, attendee email, or attendee name) from original booking to reschedule."})
-
-    title = full_booking_details.get("title")
-    description = full_booking_details.get("description", "")
-
-    # Step 2: Cancel the old event
-    cancel_status = json.loads(cancel_cal_event(booking_id))
-    if cancel_status.get("status") != "success":
-        return json.dumps({"error": f"Failed to cancel old event with ID {booking_id} during reschedule: {cancel_status.get('message', 'Unknown error')}"})
-
-    # Step 3: Book a new event with the updated times and original details
-    new_booking_response = json.loads(book_cal_event(event_type_id, new_start_time_iso, new_end_time_iso, attendee_email, attendee_name, title, description))
-
-    if "error" in new_booking_response:
-        return json.dumps({"error": f"Event cancelled, but failed to book new event during reschedule: {new_booking_response.get('error', 'Unknown error')}. Please try booking a new event manually."})
-    
-    return json.dumps({"status": "success", "message": f"Event {booking_id} successfully rescheduled.", "new_booking": new_booking_response})
+    return _tool_json(_compact_reschedule(_run_flow(_reschedule_cal_event_flow(booking_id, new_start_time_iso, new_end_time_iso))))
 
 @tool
+@metrics.timed_tool
 def create_cal_event_type(title: str, slug: str, length: int, description: str = "", hidden: bool = False) -> str:
     """
     Creates a new event type in Cal.com.
@@ -250,17 +1198,136 @@ def create_cal_event_type(title: str, slug: str, length: int, description: str =
     hidden: (Optional) A boolean indicating if the event type should be hidden (true) or public (false). Defaults to false.
     Returns a JSON string with the new event type details upon success or an error message.
     """
+    return _tool_json(_run_flow(_create_cal_event_type_flow(title, slug, length, description, hidden)))
+
+def event_types_cache_stats():
+    """
+    Returns hit/miss counters of the event types cache.
+    """
+    return EVENT_TYPES_CACHE.stats()
+
+def slots_cache_stats():
+    """
+    Returns per-day hit/miss counters of the slot availability cache.
+    """
+    return SLOTS_CACHE.stats()
+
+def booking_index_stats():
+    """
+    Returns the size and readiness of the booking index for the configured API key.
+    """
+    return _get_booking_index(_get_cal_api_key()).stats()
+
+def rate_limiter_stats():
+    """
+    Returns queue depth and wait-time counters of the Cal.com rate limiter, per read/write budget.
+    """
+    return RATE_LIMITER.stats()
+
+def circuit_stats():
+    """
+    Returns the state ("closed", "open" or "half_open") and failure counters of each endpoint group's circuit.
+    """
+    return CIRCUIT_BREAKERS.stats()
+
+def data_versions():
+    """
+    Returns change counters of the cached Cal.com data ("event_types", "slots", "bookings").
+    A counter moves whenever that data is invalidated or changed, e.g. by a booking or a webhook.
+    """
+    return {
+        "event_types": EVENT_TYPES_CACHE.version,
+        "slots": SLOTS_CACHE.version,
+        "bookings": _get_booking_index(_get_cal_api_key()).version
+    }
+
+# --- Webhook updates ---
+
+def apply_webhook_event(trigger_event, payload):
+    """
+    Applies a Cal.com webhook (BOOKING_CREATED, BOOKING_CANCELLED or BOOKING_RESCHEDULED) to the
+    booking index, the mirror and the slot cache, without calling the API.
+    Returns a dict describing what was applied; other trigger events are ignored.
+    """
     api_key = _get_cal_api_key()
     if not api_key:
-        return json.dumps({"error": "Cal.com API Key is not set in environment variables. Please set CAL_API_KEY in your .env file."})
+        return {"error": "Cal.com API Key is not set. Please set it in the Streamlit UI."}
 
-    payload = {
-        "title": title,
-        "slug": slug,
-        "length": length, # Duration in minutes
-        "description": description,
-        "hidden": hidden
-    }
+    booking_id = payload.get("bookingId", payload.get("id"))
+    booking = {**payload, "id": booking_id}
+
+    if trigger_event == "BOOKING_CREATED":
+        _store_booking(api_key, booking)
+        SLOTS_CACHE.invalidate_days(api_key, _booking_days(payload.get("startTime"), payload.get("endTime")))
+    elif trigger_event == "BOOKING_CANCELLED":
+        _store_booking(api_key, {**booking, "status": "CANCELLED"})
+        SLOTS_CACHE.invalidate_days(api_key, _booking_days(payload.get("startTime"), payload.get("endTime")))
+    elif trigger_event == "BOOKING_RESCHEDULED":
+        old_booking_id = payload.get("rescheduleId")
+        old_record = _get_booking_index(api_key).get(old_booking_id) if old_booking_id is not None else None
+        old_times = (payload.get("rescheduleStartTime"), payload.get("rescheduleEndTime"))
+        if old_record is not None and not any(old_times):
+            old_times = (old_record.get("startTime"), old_record.get("endTime"))
+        if old_booking_id is not None:
+            _mark_booking_cancelled(api_key, old_booking_id)
+        _store_booking(api_key, booking)
+        SLOTS_CACHE.invalidate_days(api_key, _booking_days(*old_times, payload.get("startTime"), payload.get("endTime")))
+    else:
+        return {"status": "ignored", "triggerEvent": trigger_event}
+
+    return {"status": "applied", "triggerEvent": trigger_event, "bookingId": booking_id}
+
+# --- Async tools ---
+# Coroutine versions of the tools above, using the async HTTP client. ASYNC_TOOLS bundles each
+# sync tool with its coroutine, so AgentExecutor.ainvoke can overlap Cal.com I/O across tool
+# calls and sessions while .invoke keeps working unchanged.
+
+@metrics.timed_tool
+async def alist_event_types() -> str:
+    return _tool_json(await _arun_flow(_list_event_types_flow()))
+
+@metrics.timed_tool
+async def aget_available_slots(event_type_slug: str, start_date_str: str, end_date_str: str) -> str:
+    return _tool_json(_compact_slots(await _arun_flow(_get_available_slots_flow(event_type_slug, start_date_str, end_date_str))))
+
+@metrics.timed_tool
+async def abook_cal_event(event_type_id: int, start_time_iso: str, end_time_iso: str, email: str, name: str, title: str, description: str = "") -> str:
+    return _tool_json(_compact_booking(await _arun_flow(_book_cal_event_flow(event_type_id, start_time_iso, end_time_iso, email, name, title, description))))
+
+@metrics.timed_tool
+async def alist_cal_events(email: str = None, start_date_str: str = None, end_date_str: str = None, status: str = None, limit: int = None) -> str:
+    return _tool_json(await _arun_flow(_list_cal_events_flow(email, start_date_str, end_date_str, status, limit)))
+
+@metrics.timed_tool
+async def acancel_cal_event(booking_id: int) -> str:
+    return _tool_json(await _arun_flow(_cancel_cal_event_flow(booking_id)))
+
+@metrics.timed_tool
+async def areschedule_cal_event(booking_id: int, new_start_time_iso: str, new_end_time_iso: str) -> str:
+    return _tool_json(_compact_reschedule(await _arun_flow(_reschedule_cal_event_flow(booking_id, new_start_time_iso, new_end_time_iso))))
+
+@metrics.timed_tool
+async def acreate_cal_event_type(title: str, slug: str, length: int, description: str = "", hidden: bool = False) -> str:
+    return _tool_json(await _arun_flow(_create_cal_event_type_flow(title, slug, length, description, hidden)))
+
+def _with_coroutine(sync_tool, coroutine):
+    """
+    Returns a copy of a @tool that also has a native coroutine implementation.
+    """
+    return StructuredTool.from_function(
+        func=sync_tool.func,
+        coroutine=coroutine,
+        name=sync_tool.name,
+        description=sync_tool.description,
+        args_schema=sync_tool.args_schema
+    )
 
-    response = _make_cal_request("event-types", method="POST", json_data=payload)
-    return json.dumps(response)
\ No newline at end of file
+ASYNC_TOOLS = [
+    _with_coroutine(list_event_types, alist_event_types),
+    _with_coroutine(get_available_slots, aget_available_slots),
+    _with_coroutine(book_cal_event, abook_cal_event),
+    _with_coroutine(list_cal_events, alist_cal_events),
+    _with_coroutine(cancel_cal_event, acancel_cal_event),
+    _with_coroutine(reschedule_cal_event, areschedule_cal_event),
+    _with_coroutine(create_cal_event_type, acreate_cal_event_type)
+]
@@ -0,0 +1,277 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- Mock Cal.com API ---
+# A local stand-in for the parts of api.cal.com/v1 used by app.py: /event-types, /slots and
+# /bookings (GET, POST, DELETE), with configurable latency, error rate and dataset size, so the
+# tools can be load-tested without touching the real API. Point app.py at it with
+# CAL_API_BASE_URL=http://127.0.0.1:<port>/v1/ and any CAL_API_KEY.
+#   python bench/mock_cal.py --port 8790 --latency 0.05 --error-rate 0.01 --bookings 5000
+
+DAY_START_HOUR = 16  # Slots are offered 16:00-24:00 UTC (9:00-17:00 in Los Angeles)
+DAY_HOURS = 8
+
+class MockCalData:
+    """
+    Generated, mutable dataset: event types, bookings and their attendees. Thread-safe.
+    """
+
+    def __init__(self, event_types=5, bookings=500, attendees=100, seed=1):
+        rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.event_types = {}
+        for n in range(1, event_types + 1):
+            length = rng.choice((15, 30, 45, 60))
+            self.event_types[n] = {"id": n, "title": f"Meeting {n}", "slug": f"meeting-{n}", "length": length, "hidden": False}
+        self.emails = [f"attendee{n}@example.com" for n in range(1, attendees + 1)]
+        self.bookings = {}
+        first_day = date.today() - timedelta(days=30)
+        for n in range(1, bookings + 1):
+            event_type = self.event_types[rng.randint(1, event_types)]
+            start = datetime.combine(first_day + timedelta(days=rng.randint(0, 90)), datetime.min.time(), tzinfo=timezone.utc)
+            start += timedelta(hours=DAY_START_HOUR, minutes=30 * rng.randint(0, DAY_HOURS * 2 - 2))
+            email = rng.choice(self.emails)
+            self.bookings[n] = self._booking(n, event_type, start, email, email.split("@")[0].title(), f"{event_type['title']} with {email}")
+        self._next_id = bookings + 1
+
+    @staticmethod
+    def _time(moment):
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def _booking(self, booking_id, event_type, start, email, name, title, description=""):
+        return {
+            "id": booking_id,
+            "uid": f"mock-{booking_id}",
+            "userId": 1,
+            "eventTypeId": event_type["id"],
+            "title": title,
+            "description": description,
+            "startTime": self._time(start),
+            "endTime": self._time(start + timedelta(minutes=event_type["length"])),
+            "status": "ACCEPTED",
+            "fromReschedule": None,
+            "metadata": {},
+            "attendees": [{"email": email, "name": name, "timeZone": "America/Los_Angeles", "locale": "en"}],
+            "user": {"id": 1, "name": "Host", "email": "host@example.com", "timeZone": "America/Los_Angeles"},
+        }
+
+    def list_event_types(self):
+        with self._lock:
+            return {"eventTypes": list(self.event_types.values())}
+
+    def create_event_type(self, body):
+        with self._lock:
+            event_type_id = max(self.event_types, default=0) + 1
+            event_type = {"id": event_type_id, "title": body.get("title"), "slug": body.get("slug"),
+                          "length": int(body.get("length") or 30), "hidden": bool(body.get("hidden"))}
+            self.event_types[event_type_id] = event_type
+            return {"event_type": event_type}
+
+    def slots(self, slug, start_date, end_date):
+        with self._lock:
+            event_type = next((et for et in self.event_types.values() if et["slug"] == slug), None)
+            if event_type is None:
+                return None
+            busy = {b["startTime"] for b in self.bookings.values() if b["status"] == "ACCEPTED"}
+        slots = {}
+        day = start_date
+        while day <= end_date:
+            start = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=DAY_START_HOUR)
+            times = []
+            for step in range(DAY_HOURS * 60 // event_type["length"]):
+                moment = start + timedelta(minutes=step * event_type["length"])
+                if self._time(moment) not in busy:
+                    times.append({"time": self._time(moment)})
+            slots[day.isoformat()] = times
+            day += timedelta(days=1)
+        return {"slots": slots}
+
+    def list_bookings(self, attendee_email=None, take=None, page=1):
+        with self._lock:
+            bookings = list(self.bookings.values())
+        if attendee_email:
+            attendee_email = attendee_email.lower()
+            bookings = [b for b in bookings if any(a["email"].lower() == attendee_email for a in b["attendees"])]
+        if take:
+            bookings = bookings[(page - 1) * take:page * take]
+        return {"bookings": bookings}
+
+    def get_booking(self, booking_id):
+        with self._lock:
+            return self.bookings.get(booking_id)
+
+    def create_booking(self, body):
+        responses = body.get("responses") or {}
+        try:
+            start = datetime.fromisoformat(body["start"].replace("Z", "+00:00")).astimezone(timezone.utc)
+        except (KeyError, AttributeError, ValueError):
+            return None
+        with self._lock:
+            event_type = self.event_types.get(body.get("eventTypeId"))
+            if event_type is None:
+                return None
+            booking_id = self._next_id
+            self._next_id += 1
+            booking = self._booking(booking_id, event_type, start, responses.get("email"), responses.get("name"),
+                                    (body.get("metadata") or {}).get("title") or event_type["title"],
+                                    (body.get("metadata") or {}).get("description") or "")
+            reschedule_uid = body.get("rescheduleUid")
+            if reschedule_uid:
+                for original in self.bookings.values():
+                    if original["uid"] == reschedule_uid:
+                        original["status"] = "CANCELLED"
+                        booking["fromReschedule"] = reschedule_uid
+            self.bookings[booking_id] = booking
+            return booking
+
+    def cancel_booking(self, booking_id):
+        with self._lock:
+            booking = self.bookings.get(booking_id)
+            if booking is None:
+                return False
+            booking["status"] = "CANCELLED"
+            return True
+
+class MockCalHandler(BaseHTTPRequestHandler):
+    data = None
+    latency = 0.0  # Seconds added to every response
+    jitter = 0.0  # Up to this many extra seconds, uniformly distributed
+    error_rate = 0.0  # Share of requests answered with error_status
+    error_status = 500
+    retry_after = None  # Retry-After header value sent with injected errors
+    protocol_version = "HTTP/1.1"  # Keep-alive, like api.cal.com
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = re.sub(r"^/v1", "", url.path).rstrip("/")
+        body = {}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._reply(400, {"message": "Invalid JSON body"})
+
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if not query.get("apiKey"):
+            return self._reply(401, {"message": "No apiKey provided"})
+        if self.error_rate and random.random() < self.error_rate:
+            headers = {"Retry-After": self.retry_after} if self.retry_after is not None else None
+            return self._reply(self.error_status, {"message": "Injected error"}, headers)
+
+        if path == "/event-types":
+            if method == "GET":
+                return self._reply(200, self.data.list_event_types())
+            if method == "POST":
+                return self._reply(200, self.data.create_event_type(body))
+        if path == "/slots" and method == "GET":
+            try:
+                start_date = date.fromisoformat(query["startDate"][:10])
+                end_date = date.fromisoformat(query["endDate"][:10])
+            except (KeyError, ValueError):
+                return self._reply(400, {"message": "startDate and endDate are required"})
+            slots = self.data.slots(query.get("eventType"), start_date, end_date)
+            if slots is None:
+                return self._reply(404, {"message": "Event type not found"})
+            return self._reply(200, slots)
+        if path == "/bookings":
+            if method == "GET":
+                take = int(query["take"]) if query.get("take") else None
+                return self._reply(200, self.data.list_bookings(query.get("attendeeEmail"), take, int(query.get("page", 1))))
+            if method == "POST":
+                booking = self.data.create_booking(body)
+                if booking is None:
+                    return self._reply(400, {"message": "Invalid booking request"})
+                return self._reply(200, booking)
+        found = re.fullmatch(r"/bookings/(\d+)", path)
+        if found:
+            booking_id = int(found.group(1))
+            if method == "GET":
+                booking = self.data.get_booking(booking_id)
+                if booking is None:
+                    return self._reply(404, {"message": "Booking not found"})
+                return self._reply(200, {"booking": booking})
+            if method == "DELETE":
+                if not self.data.cancel_booking(booking_id):
+                    return self._reply(404, {"message": "Booking not found"})
+                return self._reply(200, {"message": "Booking successfully cancelled."})
+        return self._reply(404, {"message": f"No route for {method} {url.path}"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(host="127.0.0.1", port=0, data=None, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, retry_after=None):
+    handler = type("ConfiguredMockCalHandler", (MockCalHandler,), {
+        "data": data or MockCalData(),
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "retry_after": retry_after
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_background_server(**kwargs):
+    """
+    Starts a mock server on a daemon thread and returns it; its base URL is base_url(server).
+    """
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def base_url(server):
+    return f"http://{server.server_address[0]}:{server.server_port}/v1/"
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Cal.com API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", help="Retry-After header sent with injected errors")
+    parser.add_argument("--event-types", type=int, default=5)
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--attendees", type=int, default=100)
+    args = parser.parse_args()
+
+    data = MockCalData(args.event_types, args.bookings, args.attendees)
+    server = make_server(args.host, args.port, data, args.latency, args.jitter, args.error_rate, args.error_status, args.retry_after)
+    print(f"Mock Cal.com API on {base_url(server)}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# --- Offline replay of recorded turns ---
+# Re-runs agent turns recorded with RECORD_TURNS_FILE (see recorder.py) through the same streaming
+# path as the UI (agent_stream.py), with a stub LLM answering with the recorded LLM responses and
+# a mock Cal.com answering with the recorded HTTP responses, and reports per turn: latency, prompt
+# tokens sent to the LLM, LLM calls, tool calls and Cal.com requests. Nothing leaves the machine.
+#   python bench/replay.py recordings.jsonl --repeat 5
+#   python bench/replay.py recordings.jsonl --save bench/replay_baseline.json
+#   python bench/replay.py recordings.jsonl --baseline bench/replay_baseline.json   # exits 1 on a regression
+# App caches are cleared before each run, so every turn starts cold and runs are comparable.
+
+def _query_value(value):
+    if isinstance(value, (list, tuple)):
+        return ",".join(_query_value(item) for item in value)
+    return str(value).lower()  # requests sends True as "True", httpx as "true"
+
+def _exchange_key(method, endpoint, params, json_data):
+    return (
+        method.upper(),
+        endpoint.strip("/"),
+        tuple(sorted((key, _query_value(value)) for key, value in (params or {}).items() if key != "apiKey")),
+        json.dumps(json_data, sort_keys=True) if json_data is not None else None
+    )
+
+class RecordedCal:
+    """
+    Recorded Cal.com exchanges, served in recorded order per request. A request is matched on
+    method, endpoint, query and body; failing that, on method and endpoint. The current turn's
+    exchanges are tried before those of every other turn (`fallback`), since a cold cache may
+    need data the recorded turn found cached. The last match of a key is repeated once used up.
+    """
+
+    def __init__(self, exchanges, fallback=()):
+        self._tables = [self._index(exchanges), self._index(fallback)]
+        self._lock = threading.Lock()
+        self.served = 0
+        self.unmatched = []
+
+    @staticmethod
+    def _index(exchanges):
+        exact, loose = {}, {}
+        for exchange in exchanges:
+            key = _exchange_key(exchange["method"], exchange["endpoint"], exchange["params"], exchange["json"])
+            exact.setdefault(key, []).append(exchange)
+            loose.setdefault(key[:2], []).append(exchange)
+        return {"exact": exact, "loose": loose, "used": {}}
+
+    def lookup(self, method, endpoint, params, json_data):
+        key = _exchange_key(method, endpoint, params, json_data)
+        with self._lock:
+            for table in self._tables:
+                for kind, table_key in (("exact", key), ("loose", key[:2])):
+                    candidates = table[kind].get(table_key)
+                    if candidates:
+                        used = table["used"].get((kind, table_key), 0)
+                        table["used"][(kind, table_key)] = used + 1
+                        self.served += 1
+                        return candidates[min(used, len(candidates) - 1)]
+            self.unmatched.append(f"{method} {endpoint}")
+            return None
+
+class ReplayCalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, text):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        params = {key: values[0] if len(values) == 1 else values for key, values in parse_qs(url.query).items()}
+        endpoint = re.sub(r"^/v1/", "", url.path)
+        json_data = None
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            try:
+                json_data = json.loads(self.rfile.read(length))
+            except ValueError:
+                return self._reply(400, json.dumps({"message": "Invalid JSON body"}))
+        exchange = self.server.recorded.lookup(method, endpoint, params, json_data)
+        if exchange is None:
+            return self._reply(404, json.dumps({"message": f"No recorded response for {method} {endpoint}"}))
+        if self.server.recorded_latency:
+            time.sleep(exchange["seconds"])
+        self._reply(exchange["status"], exchange["body"])
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+def start_replay_server(recorded_latency=False):
+    """
+    Starts the replay mock on a daemon thread; set `server.recorded` to a RecordedCal before each turn.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayCalHandler)
+    server.daemon_threads = True
+    server.recorded = RecordedCal([])
+    server.recorded_latency = recorded_latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# --- Replaying a turn ---
+
+def _recorded_responses(turn):
+    from langchain_core.messages import AIMessage, messages_from_dict
+
+    responses = []
+    for request in turn["llm"]:
+        message = messages_from_dict([request["response"]])[0]
+        responses.append(AIMessage(content=message.content, tool_calls=message.tool_calls,
+                                   usage_metadata=message.usage_metadata))
+    return responses
+
+def _system_prompt(turn):
+    # The recorded system message, already formatted; a generic one for recordings without LLM requests.
+    for request in turn["llm"]:
+        if request["messages"] and request["messages"][0]["type"] == "system":
+            return request["messages"][0]["data"]["content"]
+    return "You are a helpful Cal.com assistant."
+
+def prompt_tokens(llm_requests):
+    """
+    Estimated tokens sent to the LLM over a turn's requests, counted like history.py counts them.
+    """
+    from history import count_tokens
+
+    total = 0
+    for request in llm_requests:
+        for message in request["messages"]:
+            data = message["data"]
+            content = data.get("content")
+            total += count_tokens(content if isinstance(content, str) else json.dumps(content)) + 4
+            if data.get("tool_calls"):
+                total += count_tokens(json.dumps([call["args"] for call in data["tool_calls"]]))
+    return total
+
+def _completion_tokens(llm_requests):
+    total = 0
+    for request in llm_requests:
+        usage = ((request.get("response") or {}).get("data") or {}).get("usage_metadata") or {}
+        total += usage.get("output_tokens") or 0
+    return total
+
+def _fallback_answer(turn):
+    from langchain_core.messages import AIMessage
+
+    return AIMessage(content=turn.get("output") or "")
+
+def replay_turn(app, server, turn, fallback, llm_latency):
+    """
+    Replays one recorded turn and returns the new recording of it (see recorder.recording())
+    and the mock's RecordedCal, for its unmatched requests.
+    """
+    from langchain.agents import create_openai_tools_agent
+    from langchain_core.messages import SystemMessage, messages_from_dict
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    import agent_stream
+    import recorder
+    from run import _reset_caches
+    from stub_llm import ScriptedChatModel
+    from tool_executor import ConcurrentAgentExecutor
+
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content=_system_prompt(turn)),
+        MessagesPlaceholder(variable_name="chat_history"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    llm = ScriptedChatModel(script=_recorded_responses(turn) or [_fallback_answer(turn)], latency=llm_latency)
+    agent = create_openai_tools_agent(llm, app.ASYNC_TOOLS, prompt)
+    executor = ConcurrentAgentExecutor(agent=agent, tools=app.ASYNC_TOOLS, handle_parsing_errors=True)
+    inputs = dict(turn["inputs"])
+    inputs["chat_history"] = messages_from_dict(inputs.get("chat_history") or [])
+
+    _reset_caches(app)
+    server.recorded = RecordedCal(turn["cal"], fallback)
+    with recorder.recording(turn["user_input"]) as replayed:
+        for event in agent_stream.stream_agent_events(executor, inputs, recorder.callback_config(replayed)):
+            if event[0] == "output":
+                replayed.output = event[1]
+    return replayed, server.recorded
+
+def turn_name(index, turn):
+    return f"{index + 1}:{' '.join(turn['user_input'].split())[:40]}"
+
+def replay(app, server, turns, repeat, llm_latency):
+    from run import percentile
+
+    every_exchange = [exchange for turn in turns for exchange in turn["cal"]]
+    results = []
+    for index, turn in enumerate(turns):
+        latencies, replayed, recorded_cal = [], None, None
+        for _ in range(repeat):
+            replayed, recorded_cal = replay_turn(app, server, turn, every_exchange, llm_latency)
+            latencies.append(replayed.seconds)
+        latencies.sort()
+        # Deterministic given the recording, so the last run stands for all of them.
+        # Parallel tool calls finish in any order.
+        same_path = sorted(t["name"] for t in replayed.tools) == sorted(t["name"] for t in turn["tools"])
+        results.append({
+            "turn": turn_name(index, turn),
+            "n": repeat,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "recorded_ms": (turn.get("seconds") or 0.0) * 1000,
+            "prompt_tokens": prompt_tokens(replayed.llm),
+            "completion_tokens": _completion_tokens(replayed.llm),
+            "llm_calls": len(replayed.llm),
+            "tool_calls": len(replayed.tools),
+            "cal_requests": len(replayed.cal),
+            "unmatched": len(recorded_cal.unmatched),
+            "matches_recording": same_path and replayed.output == turn.get("output") and replayed.error is None
+        })
+    return results
+
+# --- Reporting ---
+
+def print_report(results):
+    print(f"{'turn':<44}{'p50 ms':>9}{'max ms':>9}{'rec ms':>9}{'prompt':>8}{'compl':>7}{'llm':>5}{'tools':>6}{'cal':>5}{'miss':>5}  same")
+    for row in results:
+        print(f"{row['turn']:<44}{row['p50_ms']:>9.1f}{row['max_ms']:>9.1f}{row['recorded_ms']:>9.1f}{row['prompt_tokens']:>8}"
+              f"{row['completion_tokens']:>7}{row['llm_calls']:>5}{row['tool_calls']:>6}{row['cal_requests']:>5}"
+              f"{row['unmatched']:>5}  {'yes' if row['matches_recording'] else 'NO'}")
+
+def compare(results, baseline, max_regression, min_ms=5.0):
+    """
+    Returns (turn, what, before, after) for each regression over the baseline: p50 latency grew
+    by more than `max_regression` (a share; latencies under `min_ms` are ignored as noise), or
+    more prompt tokens, LLM calls, tool calls or Cal.com requests than before.
+    """
+    previous = {row["turn"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row["turn"])
+        if before is None:
+            continue
+        if max(before["p50_ms"], row["p50_ms"]) >= min_ms and row["p50_ms"] > before["p50_ms"] * (1 + max_regression):
+            regressions.append((row["turn"], "p50_ms", before["p50_ms"], row["p50_ms"]))
+        for count in ("prompt_tokens", "llm_calls", "tool_calls", "cal_requests"):
+            if row[count] > before[count]:
+                regressions.append((row["turn"], count, before[count], row[count]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded agent turns offline")
+    parser.add_argument("recordings", help="File written with RECORD_TURNS_FILE")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per turn")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--recorded-latency", action="store_true", help="Answer Cal.com requests after their recorded time")
+    parser.add_argument("--save", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with a previously saved JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p50 latency growth over the baseline")
+    args = parser.parse_args()
+
+    server = start_replay_server(args.recorded_latency)
+    os.environ["CAL_API_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1/"
+    os.environ["CAL_API_KEY"] = "replay-key"
+    os.environ.pop("CAL_MIRROR_PATH", None)
+    os.environ.pop("RECORD_TURNS_FILE", None)
+    os.environ.setdefault("CAL_RATE_LIMIT_READ_RPS", "0")
+    os.environ.setdefault("CAL_RATE_LIMIT_WRITE_RPS", "0")
+    import app
+    import recorder
+
+    turns = [turn for turn in recorder.load(args.recordings) if turn.get("inputs") is not None]
+    results = replay(app, server, turns, max(1, args.repeat), args.llm_latency)
+    server.shutdown()
+
+    print_report(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for turn, what, before, after in regressions:
+            print(f"REGRESSION {turn}: {what} {before:.1f} -> {after:.1f}" if what == "p50_ms" else f"REGRESSION {turn}: {what} {before} -> {after}")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
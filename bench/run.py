@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_cal
+
+# --- End-to-end benchmark ---
+# Drives every tool in app.py, sync and async, plus a scripted agent loop (stub LLM) against the
+# mock Cal.com API, and reports p50/p95/p99 latency, throughput and allocations per scenario:
+#   python bench/run.py --iterations 200 --concurrency 8 --latency 0.02
+#   python bench/run.py --save bench/baseline.json
+#   python bench/run.py --baseline bench/baseline.json   # exits 1 if a p95 regressed
+# app.py is imported after CAL_API_BASE_URL points at the mock, so nothing reaches api.cal.com.
+
+def percentile(sorted_values, share):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(share * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(name, latencies, errors, wall, peak_kib=None):
+    latencies = sorted(latencies)
+    return {
+        "scenario": name,
+        "n": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput": len(latencies) / wall if wall else 0.0,
+        "peak_kib": peak_kib
+    }
+
+def _is_error(output):
+    try:
+        return "error" in json.loads(output)
+    except (TypeError, ValueError):
+        return True
+
+# --- Tool scenarios ---
+
+class ToolArgs:
+    """
+    Generates arguments for each tool against the mock dataset. Write tools get fresh values
+    every call (new slots, unique slugs) so they keep succeeding.
+    """
+
+    def __init__(self, data, seed=7):
+        self.data = data
+        self.rng = random.Random(seed)
+        self.next_slug = 0
+
+    def _future_time(self, event_type):
+        day = date.today() + timedelta(days=self.rng.randint(1, 60))
+        minutes = self.rng.randrange(0, mock_cal.DAY_HOURS * 60 - event_type["length"], event_type["length"])
+        start = f"{day.isoformat()}T{mock_cal.DAY_START_HOUR + minutes // 60:02d}:{minutes % 60:02d}:00Z"
+        end_minutes = minutes + event_type["length"]
+        end = f"{day.isoformat()}T{mock_cal.DAY_START_HOUR + end_minutes // 60:02d}:{end_minutes % 60:02d}:00Z"
+        return start, end
+
+    def __call__(self, tool_name):
+        rng = self.rng
+        event_type = self.data.event_types[rng.randint(1, len(self.data.event_types))]
+        if tool_name == "list_event_types":
+            return {}
+        if tool_name == "get_available_slots":
+            start = date.today() + timedelta(days=rng.randint(0, 30))
+            return {"event_type_slug": event_type["slug"], "start_date_str": start.isoformat(),
+                    "end_date_str": (start + timedelta(days=rng.randint(0, 6))).isoformat()}
+        if tool_name == "list_cal_events":
+            return {"email": rng.choice(self.data.emails)}
+        if tool_name == "book_cal_event":
+            start, end = self._future_time(event_type)
+            email = rng.choice(self.data.emails)
+            return {"event_type_id": event_type["id"], "start_time_iso": start, "end_time_iso": end,
+                    "email": email, "name": email.split("@")[0], "title": "Benchmark booking"}
+        if tool_name == "cancel_cal_event":
+            return {"booking_id": rng.randint(1, len(self.data.bookings))}
+        if tool_name == "reschedule_cal_event":
+            booking = self.data.bookings[rng.randint(1, len(self.data.bookings))]
+            start, end = self._future_time(self.data.event_types[booking["eventTypeId"]])
+            return {"booking_id": booking["id"], "new_start_time_iso": start, "new_end_time_iso": end}
+        if tool_name == "create_cal_event_type":
+            self.next_slug += 1
+            return {"title": f"Bench {self.next_slug}", "slug": f"bench-{self.next_slug}", "length": 30}
+        raise ValueError(f"No arguments for {tool_name}")
+
+def _reset_caches(app):
+    app.EVENT_TYPES_CACHE.invalidate()
+    app.SLOTS_CACHE.invalidate()
+    with app._booking_indexes_lock:
+        app._booking_indexes.clear()
+
+def bench_tools_sync(app, tool_args, iterations, cold):
+    results = []
+    for tool in app.ASYNC_TOOLS:
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(iterations):
+            if cold:
+                _reset_caches(app)
+            args = tool_args(tool.name)
+            t = time.perf_counter()
+            output = tool.invoke(args)
+            latencies.append(time.perf_counter() - t)
+            errors += _is_error(output)
+        results.append(summarize(f"sync:{tool.name}", latencies, errors, time.perf_counter() - started))
+    return results
+
+def bench_tools_async(app, tool_args, iterations, concurrency, cold):
+    async def run_tool(tool):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                if cold:
+                    _reset_caches(app)
+                args = tool_args(tool.name)
+                t = time.perf_counter()
+                output = await tool.ainvoke(args)
+                latencies.append(time.perf_counter() - t)
+                errors += _is_error(output)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(iterations)])
+        return summarize(f"async:{tool.name}", latencies, errors, time.perf_counter() - started)
+
+    async def run_all():
+        return [await run_tool(tool) for tool in app.ASYNC_TOOLS]
+
+    return asyncio.run(run_all())
+
+def bench_allocations(app, tool_args, iterations):
+    """
+    Peak traced memory per tool over `iterations` sync calls, in a separate pass since tracing slows calls down.
+    """
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for tool in app.ASYNC_TOOLS:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(iterations):
+                tool.invoke(tool_args(tool.name))
+            peaks[tool.name] = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+# --- Agent loop ---
+
+def _agent_script(tool_args):
+    from langchain_core.messages import AIMessage
+
+    event_types = {"name": "list_event_types", "args": {}, "id": "call_1"}
+    events = {"name": "list_cal_events", "args": tool_args("list_cal_events"), "id": "call_2"}
+    slots = {"name": "get_available_slots", "args": tool_args("get_available_slots"), "id": "call_3"}
+    return [
+        AIMessage(content="", tool_calls=[event_types, events]),
+        AIMessage(content="", tool_calls=[slots]),
+        AIMessage(content="Here are your event types, your bookings and the open slots.")
+    ]
+
+def bench_agent(app, tool_args, turns, concurrency, llm_latency, cold):
+    from langchain.agents import create_openai_tools_agent
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    from stub_llm import ScriptedChatModel
+    from tool_executor import ConcurrentAgentExecutor
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a Cal.com assistant."),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+
+    def build_executor():
+        llm = ScriptedChatModel(script=_agent_script(tool_args), latency=llm_latency)
+        agent = create_openai_tools_agent(llm, app.ASYNC_TOOLS, prompt)
+        return ConcurrentAgentExecutor(agent=agent, tools=app.ASYNC_TOOLS)
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def turn():
+            nonlocal errors
+            async with semaphore:
+                if cold:
+                    _reset_caches(app)
+                executor = build_executor()
+                t = time.perf_counter()
+                try:
+                    await executor.ainvoke({"input": "What can I book this week?"})
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - t)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[turn() for _ in range(turns)])
+        return summarize("agent:scripted_turn", latencies, errors, time.perf_counter() - started)
+
+    return asyncio.run(run())
+
+# --- Reporting ---
+
+def print_report(results):
+    print(f"{'scenario':<34}{'n':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ops/s':>9}{'peak KiB':>10}")
+    for row in results:
+        peak = f"{row['peak_kib']:>10.0f}" if row.get("peak_kib") is not None else f"{'-':>10}"
+        print(f"{row['scenario']:<34}{row['n']:>6}{row['errors']:>5}{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}"
+              f"{row['p99_ms']:>9.2f}{row['throughput']:>9.1f}{peak}")
+
+def compare(results, baseline, max_regression, min_ms=1.0):
+    """
+    Returns the scenarios whose p95 grew by more than `max_regression` (a share) over the baseline.
+    Latencies under `min_ms` are ignored, as they are dominated by noise.
+    """
+    previous = {row["scenario"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row["scenario"])
+        if before is None or max(before["p95_ms"], row["p95_ms"]) < min_ms:
+            continue
+        if row["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append((row["scenario"], before["p95_ms"], row["p95_ms"]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Cal.com tools against a mock API")
+    parser.add_argument("--iterations", type=int, default=100, help="Calls per tool scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="In-flight calls in async scenarios")
+    parser.add_argument("--turns", type=int, default=50, help="Scripted agent turns")
+    parser.add_argument("--latency", type=float, default=0.01, help="Mock API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Extra random mock API latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock API requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of the failed requests")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Stub LLM latency per call in seconds")
+    parser.add_argument("--bookings", type=int, default=500, help="Bookings in the mock dataset")
+    parser.add_argument("--event-types", type=int, default=5)
+    parser.add_argument("--attendees", type=int, default=100)
+    parser.add_argument("--cold", action="store_true", help="Clear the app caches before every call")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--save", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with a previously saved JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    data = mock_cal.MockCalData(args.event_types, args.bookings, args.attendees)
+    server = mock_cal.start_background_server(data=data, latency=args.latency, jitter=args.jitter,
+                                              error_rate=args.error_rate, error_status=args.error_status)
+    os.environ["CAL_API_BASE_URL"] = mock_cal.base_url(server)
+    os.environ["CAL_API_KEY"] = "bench-key"
+    os.environ.pop("CAL_MIRROR_PATH", None)
+    # Measure the tools, not the client-side rate limit, unless it is configured explicitly.
+    os.environ.setdefault("CAL_RATE_LIMIT_READ_RPS", "0")
+    os.environ.setdefault("CAL_RATE_LIMIT_WRITE_RPS", "0")
+    import app
+
+    tool_args = ToolArgs(data)
+    results = bench_tools_sync(app, tool_args, args.iterations, args.cold)
+    results += bench_tools_async(app, tool_args, args.iterations, args.concurrency, args.cold)
+    results.append(bench_agent(app, tool_args, args.turns, args.concurrency, args.llm_latency, args.cold))
+    if not args.no_alloc:
+        peaks = bench_allocations(app, tool_args, max(1, args.iterations // 10))
+        for row in results:
+            kind, _, name = row["scenario"].partition(":")
+            if kind == "sync":
+                row["peak_kib"] = peaks.get(name)
+    server.shutdown()
+
+    print_report(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for scenario, before, after in regressions:
+            print(f"REGRESSION {scenario}: p95 {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+import json
+import time
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# --- Stub chat model for benchmarks ---
+# Replays a fixed script of AIMessages (tool calls or final answers), one per model call, after an
+# optional delay standing in for LLM latency. Works with create_openai_tools_agent, invoke/ainvoke
+# and astream_events, so agent turns can be benchmarked without an OpenAI key.
+
+class ScriptedChatModel(BaseChatModel):
+    script: List[Any]
+    latency: float = 0.0  # Seconds per model call
+    position: int = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def _next_message(self):
+        message = self.script[self.position % len(self.script)]
+        self.position += 1
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    def _chunk(self, message):
+        if message.tool_calls:
+            return ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=message.usage_metadata, tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": n}
+                for n, call in enumerate(message.tool_calls)
+            ]))
+        return ChatGenerationChunk(message=AIMessageChunk(content=message.content, usage_metadata=message.usage_metadata))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        chunk = self._chunk(self._next_message())
+        if run_manager and chunk.message.content:
+            run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+        yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        chunk = self._chunk(self._next_message())
+        if run_manager and chunk.message.content:
+            await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+        yield chunk
@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from history import count_tokens
+
+# --- Token cost of tool outputs ---
+# Compares what the agent sees from each tool before (json.dumps of the raw Cal.com response) and
+# after the compact projections in app.py, on the recorded responses in fixtures/cal_responses/:
+#   python bench/token_report.py
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "cal_responses")
+
+def _rescheduled(booking):
+    return {"status": "success", "message": "Event 1048000 successfully rescheduled.", "new_booking": booking}
+
+# (tool, fixture file, flow result built from the fixture, projection applied by the tool)
+CASES = [
+    ("get_available_slots", "slots_week.json", lambda response: response, app._compact_slots),
+    ("book_cal_event", "booking_created.json", lambda response: response, app._compact_booking),
+    ("reschedule_cal_event", "booking_created.json", _rescheduled, app._compact_reschedule),
+]
+
+def report():
+    rows = []
+    for label, name, to_result, project in CASES:
+        with open(os.path.join(FIXTURES, name)) as f:
+            result = to_result(json.load(f))
+        before = json.dumps(result)
+        after = app._tool_json(project(result))
+        rows.append({"tool": label, "before": count_tokens(before), "after": count_tokens(after)})
+    return rows
+
+def main():
+    print(f"{'tool':<24}{'before':>8}{'after':>8}{'saved':>8}")
+    for row in report():
+        saved = 1 - row["after"] / row["before"] if row["before"] else 0.0
+        print(f"{row['tool']:<24}{row['before']:>8}{row['after']:>8}{saved:>8.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import threading
+import time
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+# --- In-process caches used by the Cal.com tools in app.py ---
+
+CacheEntry = namedtuple("CacheEntry", ["value", "fresh"])
+
+class TTLCache:
+    """
+    Thread-safe in-process cache whose entries become stale after `ttl` seconds.
+    Stale entries are still returned (with fresh=False) for another `max_stale` seconds,
+    so callers can serve them while a refresh runs in the background (stale-while-revalidate).
+    Older entries are dropped on access. Only the last value stored per key is kept apart,
+    until invalidated, for last_known() to serve while Cal.com is down.
+    """
+
+    def __init__(self, ttl, max_stale=0):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}
+        self._last_known = {}  # key -> last value stored, however old
+        self._generations = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.version = 0  # Bumped whenever cached data is invalidated or refreshed with different data
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns a CacheEntry for `key`, or None on a miss (absent or too old to serve).
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                value, stored_at = item
+                age = now - stored_at
+                if age <= self.ttl:
+                    self.hits += 1
+                    return CacheEntry(value, True)
+                if age <= self.ttl + self.max_stale:
+                    self.stale_hits += 1
+                    return CacheEntry(value, False)
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def last_known(self, key):
+        """
+        Returns the value stored for `key` however old it is, or None. Not counted as a hit.
+        """
+        with self._lock:
+            return self._last_known.get(key)
+
+    def generation(self, key):
+        """
+        Returns the invalidation generation of `key`. Pass it to set() so that a fetch
+        started before an invalidation cannot store its outdated result afterwards.
+        """
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key, 0):
+                return False
+            if key in self._last_known and self._last_known[key] != value:
+                self.version += 1
+            self._entries[key] = (value, time.monotonic())
+            self._last_known[key] = value
+            return True
+
+    def invalidate(self, key=None):
+        """
+        Drops `key` (or every entry when key is None).
+        """
+        with self._lock:
+            keys = set(self._entries) | set(self._last_known) if key is None else [key]
+            for k in keys:
+                self._entries.pop(k, None)
+                self._last_known.pop(k, None)
+                self._generations[k] = self._generations.get(k, 0) + 1
+            self.version += 1
+
+    def start_refresh(self, key):
+        """
+        Marks `key` as being refreshed. Returns False if a refresh is already running,
+        so only one background refresh per key is in flight.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "last_known": len(self._last_known)
+            }
+
+class SlotCache:
+    """
+    Per-day cache of available slots, keyed by (api_key, event_type_slug, day).
+    A requested date range is split into cached days and missing days, so only the missing
+    sub-ranges need to be fetched. Invalidation is per (api_key, day) across all event types,
+    because a booking blocks the host's calendar for every event type. Days before yesterday
+    (yesterday is kept for hosts behind UTC) are dropped once a day, so the cache only holds
+    current and future days.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._generations = {}
+        self._epoch = 0  # Bumped by invalidate(), which drops whole keys at once
+        self._pruned_on = None  # Day the past days were last dropped
+        self._lock = threading.Lock()
+        self.version = 0  # Bumped whenever cached data is invalidated or refreshed with different slots
+        self.hits = 0
+        self.misses = 0
+
+    def get_days(self, api_key, event_type_slug, days):
+        """
+        Returns ({day: slots} for the cached days, [missing days]) for the given date objects.
+        """
+        now = time.monotonic()
+        cached, missing = {}, []
+        with self._lock:
+            for day in days:
+                item = self._entries.get((api_key, event_type_slug, day))
+                if item is not None and now - item[1] <= self.ttl:
+                    cached[day] = item[0]
+                    self.hits += 1
+                else:
+                    missing.append(day)
+                    self.misses += 1
+        return cached, missing
+
+    def last_known_days(self, api_key, event_type_slug, days):
+        """
+        Returns {day: slots} for the given days that have an entry, however old; invalidated days are gone.
+        """
+        with self._lock:
+            items = {day: self._entries.get((api_key, event_type_slug, day)) for day in days}
+        return {day: item[0] for day, item in items.items() if item is not None}
+
+    def generations(self, api_key, days):
+        """
+        Returns the invalidation generation of each day; pass it to set_days() so that a fetch
+        started before an invalidation does not store outdated slots.
+        """
+        with self._lock:
+            return {day: (self._epoch, self._generations.get((api_key, day), 0)) for day in days}
+
+    def _prune_past_locked(self):
+        today = date.today()
+        if self._pruned_on == today:
+            return
+        self._pruned_on = today
+        oldest = today - timedelta(days=1)
+        for key in [k for k in self._entries if k[2] < oldest]:
+            del self._entries[key]
+        for key in [k for k in self._generations if k[1] < oldest]:
+            del self._generations[key]
+
+    def set_days(self, api_key, event_type_slug, slots_by_day, generations=None):
+        now = time.monotonic()
+        changed = False
+        with self._lock:
+            self._prune_past_locked()
+            for day, slots in slots_by_day.items():
+                if generations is not None and generations.get(day) != (self._epoch, self._generations.get((api_key, day), 0)):
+                    continue
+                previous = self._entries.get((api_key, event_type_slug, day))
+                changed = changed or (previous is not None and previous[0] != slots)
+                self._entries[(api_key, event_type_slug, day)] = (slots, now)
+            if changed:
+                self.version += 1
+
+    def invalidate_days(self, api_key, days):
+        days = set(days)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == api_key and k[2] in days]:
+                del self._entries[key]
+            for day in days:
+                self._generations[(api_key, day)] = self._generations.get((api_key, day), 0) + 1
+            self.version += 1
+
+    def invalidate(self, api_key=None):
+        """
+        Drops every cached day (for `api_key`, or for all keys when None).
+        """
+        with self._lock:
+            for key in [k for k in self._entries if api_key is None or k[0] == api_key]:
+                del self._entries[key]
+            self._epoch += 1
+            self.version += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+class BookingIndex:
+    """
+    In-memory index of the bookings of one API key: a booking-by-ID map plus a map from
+    normalized attendee email to booking IDs, so lookups cost O(matches).
+    Records are compact booking dicts (see app._booking_record). The index is only `ready`
+    for email lookups once a full fetch has been loaded with finish_rebuild(); changes made
+    while a rebuild is running are replayed over its result. A fetch cut off by the page limit
+    still makes the index ready, with `truncated` set.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_email = defaultdict(set)
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._pending = []
+        self.built_at = None
+        self.truncated = False  # The last rebuild stopped at the page limit, so bookings may be missing
+        self.version = 0  # Bumped whenever a booking is added or changed, including by a rebuild
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    def age(self):
+        return time.monotonic() - self.built_at if self.built_at is not None else None
+
+    @staticmethod
+    def _emails(record):
+        return {(a.get("email") or "").lower() for a in record.get("attendees", []) if a.get("email")}
+
+    def _remove_locked(self, booking_id):
+        record = self._by_id.pop(booking_id, None)
+        if record is not None:
+            for email in self._emails(record):
+                self._by_email[email].discard(booking_id)
+                if not self._by_email[email]:
+                    del self._by_email[email]
+        return record
+
+    def _upsert_locked(self, record):
+        self._remove_locked(record["id"])
+        self._by_id[record["id"]] = record
+        for email in self._emails(record):
+            self._by_email[email].add(record["id"])
+
+    def _update_locked(self, booking_id, fields):
+        record = self._by_id.get(booking_id)
+        if record is not None:
+            self._upsert_locked({**record, **fields})
+
+    def upsert(self, record):
+        with self._lock:
+            if self._by_id.get(record["id"]) != record:
+                self._upsert_locked(record)
+                self.version += 1
+            if self._rebuilding:
+                self._pending.append((record["id"], record))
+
+    def update(self, booking_id, **fields):
+        """
+        Changes fields of an indexed booking (e.g. status=...). Unknown IDs are ignored.
+        """
+        with self._lock:
+            record = self._by_id.get(booking_id)
+            if record is not None and any(record.get(name) != value for name, value in fields.items()):
+                self._update_locked(booking_id, fields)
+                self.version += 1
+            if self._rebuilding:
+                self._pending.append((booking_id, fields))
+
+    def get(self, booking_id):
+        with self._lock:
+            return self._by_id.get(booking_id)
+
+    def find_by_email(self, email):
+        with self._lock:
+            ids = self._by_email.get(email.lower(), ())
+            return sorted((self._by_id[i] for i in ids), key=lambda r: (r.get("startTime") or "", r["id"]))
+
+    def all(self):
+        with self._lock:
+            return sorted(self._by_id.values(), key=lambda r: (r.get("startTime") or "", r["id"]))
+
+    def begin_rebuild(self):
+        """
+        Starts a full rebuild. Returns False if one is already running.
+        """
+        with self._lock:
+            if self._rebuilding:
+                return False
+            self._rebuilding = True
+            self._pending = []
+            return True
+
+    def finish_rebuild(self, records, truncated=False):
+        """
+        Replaces the index with `records` from a full fetch, then replays the upserts
+        and updates made since begin_rebuild(). Pass records=None to abandon a failed rebuild,
+        and truncated=True when the fetch stopped at the page limit.
+        """
+        with self._lock:
+            if records is not None:
+                previous = self._by_id
+                self._by_id = {}
+                self._by_email = defaultdict(set)
+                for record in records:
+                    self._upsert_locked(record)
+                for booking_id, change in self._pending:
+                    if "id" in change:
+                        self._upsert_locked(change)
+                    else:
+                        self._update_locked(booking_id, change)
+                if self._by_id != previous:
+                    self.version += 1
+                self.truncated = truncated
+                self.built_at = time.monotonic()
+            self._rebuilding = False
+            self._pending = []
+
+    def stats(self):
+        with self._lock:
+            return {"ready": self.built_at is not None, "truncated": self.truncated, "bookings": len(self._by_id), "emails": len(self._by_email)}
+
+def contiguous_runs(days):
+    """
+    Groups a sorted list of date objects into (first, last) runs of consecutive days.
+    """
+    runs = []
+    for day in days:
+        if runs and (day - runs[-1][1]).days == 1:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
@@ -0,0 +1,117 @@
+import threading
+import time
+
+# --- Circuit breakers for the Cal.com backend ---
+# One breaker per endpoint group ("bookings", "slots", "event-types"). After `failure_threshold`
+# consecutive failures (5xx, timeouts, connection errors) the circuit opens and calls fail fast
+# for `reset_timeout` seconds. It then goes half-open: up to `half_open_probes` calls are let
+# through, and the first result decides whether it closes again or reopens.
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_probes=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _refresh_locked(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_locked(time.monotonic())
+            return self._state
+
+    def retry_in(self):
+        """
+        Seconds until an open circuit lets a probe through (0 when not open).
+        """
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self):
+        """
+        Returns True if a call may go ahead. In half-open state, only `half_open_probes` calls are admitted.
+        """
+        with self._lock:
+            self._refresh_locked(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """
+        Gives back a trial call that ended without a result (e.g. it was cancelled), so it does not
+        leave the circuit half-open with no trials left. A no-op once the call was recorded.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def stats(self):
+        with self._lock:
+            self._refresh_locked(time.monotonic())
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+class CircuitBreakers:
+    """
+    Lazily created breakers, one per endpoint group, sharing the same settings.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_probes=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, group):
+        with self._lock:
+            breaker = self._breakers.get(group)
+            if breaker is None:
+                breaker = self._breakers[group] = CircuitBreaker(group, self.failure_threshold, self.reset_timeout, self.half_open_probes)
+            return breaker
+
+    def stats(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
@@ -0,0 +1,118 @@
+import json
+import os
+from typing import List, Optional
+
+# --- JSON backend ---
+# Encoding of tool outputs and parsing of Cal.com responses go through dumps() and loads(), which
+# use orjson when it is installed, then msgspec, then the standard library; JSON_BACKEND picks one
+# explicitly. All backends produce the same compact UTF-8 output ('{"a":1}', no ASCII escaping).
+# With msgspec installed, loads(data, schema) also decodes the large payloads (booking pages,
+# event types) straight into typed structs holding only the fields app.py reads, skipping the rest
+# of each object (user, metadata, responses, ...) without building it.
+
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()  # "auto", "orjson", "msgspec" or "json"
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Optional dependency
+    msgspec = None
+
+def _pick_backend():
+    available = [name for name, module in (("orjson", orjson), ("msgspec", msgspec)) if module is not None] + ["json"]
+    return JSON_BACKEND if JSON_BACKEND in available else available[0]
+
+BACKEND = _pick_backend()
+
+if BACKEND == "orjson":
+    def dumps(obj):
+        """
+        Compact JSON text for `obj`.
+        """
+        return orjson.dumps(obj).decode("utf-8")
+
+    def _loads(data):
+        return orjson.loads(data)  # orjson.JSONDecodeError is a ValueError
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj):
+        """
+        Compact JSON text for `obj`.
+        """
+        return _encoder.encode(obj).decode("utf-8")
+
+    def _loads(data):
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+else:
+    def dumps(obj):
+        """
+        Compact JSON text for `obj`.
+        """
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def _loads(data):
+        return json.loads(data)
+
+# --- Typed payloads ---
+# The fields of each payload that app.py reads (see _booking_record, _booking_matches and
+# _summarize_event_types); everything else in the response is skipped while decoding.
+
+if msgspec is not None:
+    class Attendee(msgspec.Struct):
+        email: Optional[str] = None
+        name: Optional[str] = None
+
+    class Booking(msgspec.Struct):
+        id: Optional[int] = None
+        uid: Optional[str] = None
+        title: Optional[str] = None
+        description: Optional[str] = None
+        startTime: Optional[str] = None
+        endTime: Optional[str] = None
+        status: Optional[str] = None
+        eventTypeId: Optional[int] = None
+        attendees: List[Attendee] = []
+
+    class BookingsPage(msgspec.Struct):
+        bookings: List[Booking] = []
+
+    class EventType(msgspec.Struct):
+        id: Optional[int] = None
+        title: Optional[str] = None
+        slug: Optional[str] = None
+
+    class EventTypesPage(msgspec.Struct):
+        eventTypes: List[EventType] = []
+
+    _TYPED_DECODERS = {
+        "bookings": msgspec.json.Decoder(BookingsPage),
+        "event_types": msgspec.json.Decoder(EventTypesPage)
+    }
+else:
+    _TYPED_DECODERS = {}
+
+def loads(data, schema=None):
+    """
+    Parses JSON `data` (bytes or str); raises ValueError on invalid JSON. With msgspec installed,
+    a `schema` ("bookings" or "event_types") decodes through the matching compact structs, returned
+    as plain dicts with just those fields. Payloads that do not fit the schema (e.g. an unexpected
+    type) are parsed in full instead.
+    """
+    decoder = _TYPED_DECODERS.get(schema)
+    if decoder is not None:
+        try:
+            return msgspec.to_builtins(decoder.decode(data))
+        except msgspec.ValidationError:
+            pass
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return _loads(data)
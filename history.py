@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import re
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# --- Bounded chat history for agent invocations ---
+# Instead of sending the whole conversation on every turn, the agent gets the last
+# CHAT_HISTORY_TURNS turns verbatim, a rolling summary of the older ones, and the key facts
+# (attendee emails, event type IDs, booking IDs) seen so far, within CHAT_HISTORY_TOKEN_BUDGET.
+# Booking IDs are only taken after an explicit marker ("ID: 501", "#501", "booking 501"), never
+# from dates or times. `python history.py eval` checks extract_facts() on fixtures/history_facts.jsonl.
+
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+CHAT_HISTORY_MAX_FACTS = 5  # Most recent values kept per fact
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Event type listings name the type first ("event type 30min, ID: 5") or show its slug ("(slug: `30min`, ID: 5)").
+_EVENT_TYPE_ID_RE = re.compile(r"(?:event[ -]?type\b[^\n]{0,60}?|\bslug\W{1,3}[\w-]+\W{1,3})\bID\b\W{0,3}(\d+)", re.IGNORECASE)
+# The number must not continue as a date, time or decimal ("2024-06-15", "10:30", "1.5").
+_BOOKING_ID_RE = re.compile(r"(?:\bID\b\W{0,3}|#|\b(?:event|booking)\s+)(\d+)(?![\d/:-]|\.\d)", re.IGNORECASE)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text):
+        return len(_encoding.encode(text))
+except Exception:  # tiktoken missing or its data unavailable offline
+    def count_tokens(text):
+        return len(text) // 4 + 1
+
+def _message_tokens(message):
+    return count_tokens(message.content) + 4  # Per-message overhead of the chat format
+
+def _turn_starts(messages):
+    return [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+def extract_facts(text):
+    """
+    Returns {"emails", "event_type_ids", "booking_ids"} found in `text`.
+    """
+    event_type_ids = _EVENT_TYPE_ID_RE.findall(text)
+    return {
+        "emails": _EMAIL_RE.findall(text),
+        "event_type_ids": event_type_ids,
+        "booking_ids": [i for i in _BOOKING_ID_RE.findall(text) if i not in event_type_ids]
+    }
+
+def default_summarizer(previous_summary, messages):
+    """
+    Extractive fallback used when no LLM summarizer is given: keeps the first line of each
+    message, clipped, after the previous summary.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        first_line = message.content.strip().splitlines()[0] if message.content.strip() else ""
+        lines.append(f"{role}: {first_line[:160]}")
+    return "\n".join(lines)[-2000:]
+
+class ChatHistoryManager:
+    """
+    Keeps the rolling summary and key facts of one chat session.
+    Call build() before invoking the agent, and compact() once a turn has been answered
+    (compaction may call the summarizer, so it is kept off the path to the first token; build()
+    only calls it when the window alone is over the token budget).
+    `summarizer(previous_summary, messages) -> str` folds old messages into the summary.
+    """
+
+    def __init__(self, max_turns=CHAT_HISTORY_TURNS, token_budget=CHAT_HISTORY_TOKEN_BUDGET, summarizer=None):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summarizer = summarizer or default_summarizer
+        self.summary = ""
+        self.summarized_upto = 0  # Number of leading messages already folded into the summary
+        self.facts = {"emails": [], "event_type_ids": [], "booking_ids": []}
+
+    def _window_start(self, messages):
+        """
+        Index of the first message of the last `max_turns` turns.
+        """
+        starts = _turn_starts(messages)
+        if len(starts) <= self.max_turns:
+            return 0
+        return starts[-self.max_turns]
+
+    def _remember_facts(self, messages):
+        for message in messages:
+            for name, values in extract_facts(message.content).items():
+                known = self.facts[name]
+                for value in values:
+                    if value in known:
+                        known.remove(value)
+                    known.append(value)
+                del known[:-CHAT_HISTORY_MAX_FACTS]
+
+    def _fold(self, messages, upto):
+        """
+        Folds messages[summarized_upto:upto] into the summary and facts.
+        """
+        if upto <= self.summarized_upto:
+            return
+        old_messages = messages[self.summarized_upto:upto]
+        self._remember_facts(old_messages)
+        self.summary = self.summarizer(self.summary, old_messages)
+        self.summarized_upto = upto
+
+    def _skip_leading_replies(self, messages):
+        """
+        Moves past assistant messages before the first user message (the greeting): they carry
+        nothing to remember, so they are left out without calling the summarizer.
+        """
+        while self.summarized_upto < len(messages) - 1 and isinstance(messages[self.summarized_upto], AIMessage):
+            self.summarized_upto += 1
+
+    def compact(self, messages):
+        """
+        Folds messages that fell out of the verbatim window into the summary and facts.
+        """
+        self._skip_leading_replies(messages)
+        self._fold(messages, self._window_start(messages))
+
+    def _memory_message(self):
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        fact_lines = [
+            f"- {label}: {', '.join(self.facts[name])}"
+            for name, label in (("emails", "Attendee emails"), ("event_type_ids", "Event type IDs"), ("booking_ids", "Booking IDs"))
+            if self.facts[name]
+        ]
+        if fact_lines:
+            parts.append("Known facts from the earlier conversation:\n" + "\n".join(fact_lines))
+        return SystemMessage(content="\n\n".join(parts)) if parts else None
+
+    def build(self, messages):
+        """
+        Returns the chat_history for the next agent invocation: the memory message (summary and
+        facts) followed by the recent messages, trimmed oldest-first to fit the token budget.
+        Trimmed turns are folded into the summary and facts first, so nothing is lost; this only
+        calls the summarizer when the window is over budget. The latest message is always kept.
+        """
+        self._skip_leading_replies(messages)
+        while True:
+            recent = messages[self.summarized_upto:]
+            memory = self._memory_message()
+            budget = self.token_budget - (_message_tokens(memory) if memory else 0)
+            used = sum(_message_tokens(message) for message in recent)
+            dropped = 0
+            while len(recent) - dropped > 1 and used > budget:
+                used -= _message_tokens(recent[dropped])
+                dropped += 1
+            # Trim whole turns, so the window does not start with a dangling assistant reply.
+            while len(recent) - dropped > 1 and isinstance(recent[dropped], AIMessage):
+                dropped += 1
+            if not dropped:
+                return ([memory] if memory else []) + list(recent)
+            # The summary grew, so check the budget again with the new memory message.
+            self._fold(messages, self.summarized_upto + dropped)
+
+def evaluate(path):
+    """
+    Checks extract_facts() on a JSONL file of {"text", "facts"}, where "facts" lists the expected
+    values per fact name (names left out are not checked). Returns counts and the failing cases.
+    """
+    counts = {"total": 0, "passed": 0, "failures": []}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            counts["total"] += 1
+            facts = extract_facts(case["text"])
+            wrong = {name: facts[name] for name, expected in case["facts"].items() if facts[name] != expected}
+            if wrong:
+                counts["failures"].append({"text": case["text"], "got": wrong})
+            else:
+                counts["passed"] += 1
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat history tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    eval_parser = subparsers.add_parser("eval", help="Check fact extraction on an evaluation set")
+    eval_parser.add_argument("path", nargs="?", default="fixtures/history_facts.jsonl")
+    args = parser.parse_args()
+    result = evaluate(args.path)
+    print(json.dumps(result, indent=2))
+    if result["failures"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
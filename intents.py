@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+import app
+import fastjson
+
+# --- Deterministic fast path for simple commands ---
+# Fully specified requests such as "list my event types" or "cancel event 12345" are matched
+# locally and sent straight to the matching tool, skipping the LLM round trips. A message is
+# only routed when a grammar rule matches the whole message AND the keyword classifier agrees
+# with enough confidence; everything else falls back to the agent.
+# `python intents.py eval` scores the matcher on fixtures/intents_eval.jsonl.
+
+INTENT_MIN_CONFIDENCE = 0.5
+INTENT_LIST_LIMIT = int(os.getenv("INTENT_LIST_LIMIT", "20"))  # Events listed in one fast-path reply
+
+_POLITE_PREFIX = r"(?:(?:hi|hey|ok|okay)[,!]?\s+)?(?:(?:please|pls|can you|could you|would you|i want to|i'd like to)\s+)*"
+_POLITE_SUFFIX = r"(?:\s*,?\s*please)?\s*[.!?]*"
+_EMAIL = r"(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+_DATE = r"\d{4}-\d{2}-\d{2}"
+
+_RULES = [
+    ("list_event_types", re.compile(
+        _POLITE_PREFIX + r"(?:list|show|get|display|what are|which are|tell me)(?: me)?(?: all)?(?: of)?(?: my| the| your| available)* event[ -]?types"
+        r"(?: (?:do you have|are there|are available|i have))?" + _POLITE_SUFFIX)),
+    ("list_event_types", re.compile(
+        _POLITE_PREFIX + r"what event[ -]?types (?:do (?:you|i) have|are (?:there|available))" + _POLITE_SUFFIX)),
+    ("list_cal_events", re.compile(
+        _POLITE_PREFIX + r"(?:list|show|get|display|find)(?: me)?(?: all)?(?: my| the)? (?:events|bookings|meetings)(?: booked)? (?:for|with|of) " + _EMAIL + _POLITE_SUFFIX)),
+    ("cancel_cal_event", re.compile(
+        _POLITE_PREFIX + r"cancel(?: the| my)? (?:event|booking|meeting)(?: with)?(?: id)?\s*#?(?P<booking_id>\d+)" + _POLITE_SUFFIX)),
+    ("get_available_slots", re.compile(
+        _POLITE_PREFIX + r"(?:show |list |check |get )?(?:the )?(?:availability|available slots|free slots|open slots) for (?P<event_type_slug>[a-z0-9][a-z0-9-]*)"
+        r" (?:on (?P<day>" + _DATE + r")|from (?P<start>" + _DATE + r") (?:to|until|through) (?P<end>" + _DATE + r"))" + _POLITE_SUFFIX)),
+]
+
+_CONFIRM_RE = re.compile(r"(?:yes|yep|yeah|y|confirm|confirmed|sure|go ahead|do it)(?:[,!]?\s*(?:please|cancel it|go ahead|confirm(?:ed)?))?[.!]*")
+_DECLINE_RE = re.compile(r"(?:no|nope|n|don't|do not|never ?mind|keep it)(?:[,!]?\s*(?:thanks|thank you|keep it|don't cancel))?[.!]*")
+
+# Keyword classifier: the share of the message's words that belong to the intent's vocabulary.
+_KEYWORDS = {
+    "list_event_types": {"list", "show", "get", "display", "what", "which", "are", "tell", "me", "all", "of", "my", "the", "your",
+                         "available", "event", "types", "type", "event-types", "do", "you", "i", "have", "there", "please", "can"},
+    "list_cal_events": {"list", "show", "get", "display", "find", "me", "all", "my", "the", "events", "bookings", "meetings",
+                        "booked", "for", "with", "of", "please", "can", "you"},
+    "cancel_cal_event": {"cancel", "the", "my", "event", "booking", "meeting", "with", "id", "please", "can", "you"},
+    "get_available_slots": {"show", "list", "check", "get", "the", "availability", "available", "slots", "free", "open", "for",
+                            "on", "from", "to", "until", "through", "please", "can", "you"},
+}
+_TOKEN_RE = re.compile(r"[a-z][a-z'-]*")
+
+def _normalize(text):
+    return " ".join(text.lower().strip().split())
+
+def classify(text):
+    """
+    Returns (intent, confidence) for the best-scoring intent. Emails and numbers are ignored,
+    as they are matched by the grammar rules.
+    """
+    words = _TOKEN_RE.findall(_normalize(re.sub(r"\S+@\S+|\d\S*", " ", text)))
+    if not words:
+        return None, 0.0
+    scores = {intent: sum(w in vocabulary for w in words) / len(words) for intent, vocabulary in _KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best, scores[best]
+
+def _valid_range(start, end):
+    try:
+        return datetime.strptime(start, "%Y-%m-%d") <= datetime.strptime(end, "%Y-%m-%d")
+    except ValueError:
+        return False
+
+def match(text):
+    """
+    Returns (tool_name, tool_args) when `text` is a high-confidence, fully specified command, else None.
+    Impossible dates (e.g. 2024-13-45) or a reversed range fall back to the agent.
+    """
+    normalized = _normalize(text)
+    for intent, rule in _RULES:
+        found = rule.fullmatch(normalized)
+        if not found:
+            continue
+        groups = found.groupdict()
+        # Classify the wording only, without the captured values (emails, IDs, slugs, dates).
+        wording = normalized
+        for name in sorted((n for n in groups if groups[n]), key=found.start, reverse=True):
+            wording = wording[:found.start(name)] + " " + wording[found.end(name):]
+        classified, confidence = classify(wording)
+        if classified != intent or confidence < INTENT_MIN_CONFIDENCE:
+            return None
+        if intent == "list_event_types":
+            return intent, {}
+        if intent == "list_cal_events":
+            return intent, {"email": groups["email"], "limit": INTENT_LIST_LIMIT}
+        if intent == "cancel_cal_event":
+            return intent, {"booking_id": int(groups["booking_id"])}
+        start = groups.get("day") or groups.get("start")
+        end = groups.get("day") or groups.get("end")
+        if not _valid_range(start, end):
+            return None
+        return intent, {"event_type_slug": groups["event_type_slug"], "start_date_str": start, "end_date_str": end}
+    return None
+
+# --- Local reply formatting ---
+
+def _format_error(result):
+    # Not only Cal.com's own errors: tools also report local ones (missing API key, bad input).
+    return f"Sorry, I couldn't do that: {result['error']}"
+
+def format_reply(tool_name, args, result):
+    if "error" in result:
+        return _format_error(result)
+    if tool_name == "list_event_types":
+        event_types = result.get("eventTypes", [])
+        if not event_types:
+            return "You don't have any event types yet."
+        lines = [f"- **{et.get('title')}** (slug: `{et.get('slug')}`, ID: {et.get('id')})" for et in event_types]
+        return "Here are your event types:\n" + "\n".join(lines)
+    if tool_name == "list_cal_events":
+        bookings = result.get("bookings", [])
+        if not bookings:
+            return f"I couldn't find any events for {args['email']}."
+        lines = [f"- **{b.get('title')}**: {b.get('startTime')} to {b.get('endTime')} (ID: {b.get('id')})" for b in bookings]
+        more = "\n\nThere are more events; ask me to narrow it down by date." if result.get("hasMore") or result.get("truncated") else ""
+        return f"Here are the events for {args['email']}:\n" + "\n".join(lines) + more
+    if tool_name == "cancel_cal_event":
+        return result.get("message", f"Event with ID {args['booking_id']} cancelled successfully.")
+    if tool_name == "get_available_slots":
+        slots = result.get("slots", {})
+        if not slots:
+            return f"There are no available slots for `{args['event_type_slug']}` in that range."
+        lines = [f"- **{day}**: {', '.join(ranges)}" for day, ranges in slots.items()]
+        every = f", a slot every {result['interval']} minutes within each range" if result.get("interval") else ""
+        more = result.get("moreAvailable")
+        more = f"\n\nThere are more slots from {more['from']} to {more['to']}; ask me for those days." if more else ""
+        return f"Available start times for `{args['event_type_slug']}` (UTC{every}):\n" + "\n".join(lines) + more
+    return json.dumps(result)
+
+class IntentRouter:
+    """
+    Sits in front of the AgentExecutor. route() returns a locally formatted reply, or None to
+    fall back to the agent. Destructive commands (cancel) are only executed after the user
+    confirms, which is tracked in the per-session `state` dict. hits/misses feed hit_rate().
+    """
+
+    def __init__(self, tools=None):
+        self.tools = tools or {t.name: t for t in (app.list_event_types, app.list_cal_events, app.cancel_cal_event, app.get_available_slots)}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def hit_rate(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def _run(self, tool_name, args):
+        return format_reply(tool_name, args, fastjson.loads(self.tools[tool_name].invoke(args)))
+
+    def route(self, text, state):
+        pending = state.pop("pending_intent", None)
+        if pending is not None:
+            normalized = _normalize(text)
+            if _CONFIRM_RE.fullmatch(normalized):
+                self._count(True)
+                return self._run(*pending)
+            if _DECLINE_RE.fullmatch(normalized):
+                self._count(True)
+                return "Okay, I won't cancel it."
+            # Anything else drops the pending action and goes through the normal path.
+
+        matched = match(text)
+        if matched is None:
+            self._count(False)
+            return None
+        self._count(True)
+        tool_name, args = matched
+        if tool_name == "cancel_cal_event":
+            state["pending_intent"] = (tool_name, args)
+            return f"Please confirm: do you want to cancel the event with ID {args['booking_id']}? Reply **yes** to confirm or **no** to keep it."
+        return self._run(tool_name, args)
+
+# --- Evaluation ---
+
+def evaluate(path):
+    """
+    Scores match() on a JSONL file of {"text", "intent", "args"} (intent null = must fall back).
+    Returns counts plus precision (routed correctly / routed) and hit rate (routed / routable).
+    """
+    counts = {"total": 0, "routable": 0, "routed": 0, "correct": 0, "false_routes": []}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            counts["total"] += 1
+            expected = case.get("intent")
+            counts["routable"] += expected is not None
+            matched = match(case["text"])
+            if matched is None:
+                continue
+            counts["routed"] += 1
+            if matched[0] == expected and matched[1] == case.get("args", matched[1]):
+                counts["correct"] += 1
+            else:
+                counts["false_routes"].append(case["text"])
+    counts["precision"] = counts["correct"] / counts["routed"] if counts["routed"] else 1.0
+    counts["hit_rate"] = counts["correct"] / counts["routable"] if counts["routable"] else 0.0
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Intent fast-path tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    eval_parser = subparsers.add_parser("eval", help="Score the matcher on an evaluation set")
+    eval_parser.add_argument("path", nargs="?", default="fixtures/intents_eval.jsonl")
+    args = parser.parse_args()
+    result = evaluate(args.path)
+    print(json.dumps(result, indent=2))
+    if result["false_routes"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import bisect
+import functools
+import inspect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# --- In-process metrics ---
+# Latency histograms and counters for Cal.com requests (recorded in app.py's request layer),
+# tool calls and LLM calls, so time spent waiting on Cal.com can be told apart from time spent
+# waiting on the model. They are exported in Prometheus text format on
+# http://METRICS_HOST:METRICS_PORT/metrics (see start_background_server) and summarized in the sidebar.
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # 0 disables the endpoint
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)  # Bytes
+
+_server = None
+_server_lock = threading.Lock()
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    """
+    Fixed-bucket histogram with labels, like a Prometheus client histogram.
+    """
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def _merged(self, **labels):
+        """
+        Bucket counts and sum over every series matching `labels`.
+        """
+        wanted = {self.labelnames.index(name): str(value) for name, value in labels.items()}
+        counts, total = [0] * (len(self.buckets) + 1), 0.0
+        with self._lock:
+            for key, (series_counts, series_sum) in self._series.items():
+                if all(key[i] == value for i, value in wanted.items()):
+                    counts = [a + b for a, b in zip(counts, series_counts)]
+                    total += series_sum
+        return counts, total
+
+    def summary(self, **labels):
+        """
+        Returns {"count", "avg", "p50", "p95"} over the series matching `labels`. Percentiles are
+        interpolated within buckets, as Prometheus' histogram_quantile() does.
+        """
+        counts, total = self._merged(**labels)
+        count = sum(counts)
+        return {
+            "count": count,
+            "avg": total / count if count else None,
+            "p50": self._quantile(counts, 0.5),
+            "p95": self._quantile(counts, 0.95)
+        }
+
+    def _quantile(self, counts, q):
+        count = sum(counts)
+        if not count:
+            return None
+        rank, seen = q * count, 0
+        for n, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if n == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[n - 1] if n else 0.0
+                return lower + (self.buckets[n] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+# Cal.com requests, one observation per attempt. "endpoint" is the endpoint group (bookings, slots,
+# event-types); "status" is the HTTP status, or "error" when no response arrived. Connect time
+# includes DNS resolution and the TLS handshake, and is only recorded when a new connection was opened.
+CAL_REQUEST_SECONDS = Histogram("calbot_cal_request_seconds", "Cal.com request time, per attempt, including reading the body.", ("endpoint", "method", "status"))
+CAL_CONNECT_SECONDS = Histogram("calbot_cal_connect_seconds", "Time to open a new connection to Cal.com (DNS, TCP and TLS).", ("endpoint",))
+CAL_TTFB_SECONDS = Histogram("calbot_cal_ttfb_seconds", "Time from sending a Cal.com request to receiving its response headers.", ("endpoint",))
+CAL_RESPONSE_BYTES = Histogram("calbot_cal_response_bytes", "Size of Cal.com response bodies.", ("endpoint",), SIZE_BUCKETS)
+CAL_RETRIES = Counter("calbot_cal_retries_total", "Cal.com requests retried after a transient failure.", ("endpoint", "method"))
+TOOL_SECONDS = Histogram("calbot_tool_seconds", "Tool call time, end to end.", ("tool", "outcome"))
+LLM_SECONDS = Histogram("calbot_llm_seconds", "LLM call time, end to end.", ("model", "outcome"))
+
+METRICS = [CAL_REQUEST_SECONDS, CAL_CONNECT_SECONDS, CAL_TTFB_SECONDS, CAL_RESPONSE_BYTES, CAL_RETRIES, TOOL_SECONDS, LLM_SECONDS]
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def summary():
+    """
+    Latency summaries for the sidebar: Cal.com requests, tool calls and LLM calls.
+    """
+    return {
+        "cal": CAL_REQUEST_SECONDS.summary(),
+        "tools": TOOL_SECONDS.summary(),
+        "llm": LLM_SECONDS.summary(),
+        "retries": CAL_RETRIES.total()
+    }
+
+def _tool_outcome(result):
+    # Tools return JSON strings; errors are {"error": ...} objects (see app._tool_json).
+    return "error" if isinstance(result, str) and result.startswith('{"error"') else "ok"
+
+def timed_tool(func):
+    """
+    Decorator recording a tool function's duration in TOOL_SECONDS. Works on plain and async
+    functions; the async variants in app.py are named a<tool>, and are recorded under <tool>.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started, outcome = time.perf_counter(), "exception"
+            try:
+                result = await func(*args, **kwargs)
+                outcome = _tool_outcome(result)
+                return result
+            finally:
+                TOOL_SECONDS.observe(time.perf_counter() - started, tool=func.__name__.removeprefix("a"), outcome=outcome)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started, outcome = time.perf_counter(), "exception"
+        try:
+            result = func(*args, **kwargs)
+            outcome = _tool_outcome(result)
+            return result
+        finally:
+            TOOL_SECONDS.observe(time.perf_counter() - started, tool=func.__name__, outcome=outcome)
+    return wrapper
+
+class LLMTimingHandler(BaseCallbackHandler):
+    """
+    Callback handler recording the duration of each LLM call in LLM_SECONDS.
+    """
+
+    run_inline = True  # Cheap enough to run on the agent loop instead of an executor thread
+
+    def __init__(self):
+        self._started = {}
+
+    def _start(self, serialized, run_id, kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model_name") or (kwargs.get("invocation_params") or {}).get("model")
+        self._started[run_id] = (time.perf_counter(), model or (serialized or {}).get("name", "unknown"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def _end(self, run_id, outcome):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_SECONDS.observe(time.perf_counter() - started[0], model=started[1], outcome=outcome)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, "ok")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error")
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep the Streamlit console quiet
+
+def start_background_server(host=METRICS_HOST, port=METRICS_PORT):
+    """
+    Serves /metrics on a daemon thread, once per process. Returns the server, or None when
+    disabled (port 0) or when the port is taken, e.g. by another Streamlit process.
+    """
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError:
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# --- Local SQLite mirror of Cal.com bookings and event types ---
+# Used by app.py when CAL_MIRROR_PATH is set. It only stores data; fetching and syncing is done
+# by app.py. Rows are scoped by `account`, a hash of the API key, so the key itself is never
+# written to disk.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS event_types (
+    account TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT,
+    slug TEXT,
+    PRIMARY KEY (account, id)
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    account TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    uid TEXT,
+    title TEXT,
+    description TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    status TEXT,
+    event_type_id INTEGER,
+    row_hash TEXT NOT NULL,
+    PRIMARY KEY (account, id)
+);
+CREATE TABLE IF NOT EXISTS attendees (
+    account TEXT NOT NULL,
+    booking_id INTEGER NOT NULL,
+    email TEXT,
+    email_norm TEXT,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT NOT NULL,
+    name TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (account, name)
+);
+CREATE INDEX IF NOT EXISTS idx_attendees_email ON attendees (account, email_norm);
+CREATE INDEX IF NOT EXISTS idx_attendees_booking ON attendees (account, booking_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_start ON bookings (account, start_time);
+CREATE INDEX IF NOT EXISTS idx_bookings_event_type ON bookings (account, event_type_id);
+"""
+
+_BOOKING_COLUMNS = "b.id, b.uid, b.title, b.description, b.start_time, b.end_time, b.status, b.event_type_id"
+
+def account_for(api_key):
+    """
+    Returns the mirror account identifier for an API key.
+    """
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def _row_hash(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class CalMirror:
+    """
+    SQLite store (WAL mode) mirroring bookings, attendees and event types.
+    Booking records have the shape produced by app._booking_record.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _mark_synced(self, account, name):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (account, name, synced_at) VALUES (?, ?, ?)",
+            (account, name, time.time())
+        )
+
+    def last_synced(self, account, name):
+        """
+        Returns the wall-clock time `name` ("bookings" or "event_types") was last fully synced, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM sync_state WHERE account = ? AND name = ?", (account, name)
+            ).fetchone()
+        return row[0] if row else None
+
+    def expire(self, account, name):
+        """
+        Forgets that `name` was synced, so it is not served again until the next full sync;
+        for writes whose result the mirror does not know, e.g. a newly created event type.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM sync_state WHERE account = ? AND name = ?", (account, name))
+
+    # --- Event types ---
+
+    def replace_event_types(self, account, event_types):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM event_types WHERE account = ?", (account,))
+                self._conn.executemany(
+                    "INSERT INTO event_types (account, id, title, slug) VALUES (?, ?, ?, ?)",
+                    [(account, et.get("id"), et.get("title"), et.get("slug")) for et in event_types]
+                )
+                self._mark_synced(account, "event_types")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def event_types(self, account):
+        """
+        Returns the mirrored event types as [{"id", "title", "slug"}], or None if never synced.
+        """
+        if self.last_synced(account, "event_types") is None:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title, slug FROM event_types WHERE account = ? ORDER BY id", (account,)
+            ).fetchall()
+        return [{"id": row[0], "title": row[1], "slug": row[2]} for row in rows]
+
+    # --- Bookings ---
+
+    def _write_booking(self, account, record, row_hash):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO bookings (account, id, uid, title, description, start_time, end_time, status, event_type_id, row_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (account, record["id"], record.get("uid"), record.get("title"), record.get("description"),
+             record.get("startTime"), record.get("endTime"), record.get("status"), record.get("eventTypeId"), row_hash)
+        )
+        self._conn.execute("DELETE FROM attendees WHERE account = ? AND booking_id = ?", (account, record["id"]))
+        self._conn.executemany(
+            "INSERT INTO attendees (account, booking_id, email, email_norm, name) VALUES (?, ?, ?, ?, ?)",
+            [(account, record["id"], a.get("email"), (a.get("email") or "").lower() or None, a.get("name"))
+             for a in record.get("attendees", [])]
+        )
+
+    def _delete_booking(self, account, booking_id):
+        self._conn.execute("DELETE FROM bookings WHERE account = ? AND id = ?", (account, booking_id))
+        self._conn.execute("DELETE FROM attendees WHERE account = ? AND booking_id = ?", (account, booking_id))
+
+    def upsert_booking(self, account, record):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_booking(account, record, _row_hash(record))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def update_booking(self, account, booking_id, **fields):
+        """
+        Changes fields of a mirrored booking (e.g. status=...). Unknown IDs are ignored.
+        """
+        record = self.get_booking(account, booking_id)
+        if record is not None:
+            self.upsert_booking(account, {**record, **fields})
+
+    def apply_bookings_snapshot(self, account, records, complete=True):
+        """
+        Delta-applies a full listing: only new or changed bookings are written and bookings that
+        are no longer listed are deleted. A listing cut off at the page limit (complete=False)
+        deletes nothing and leaves the bookings marked as not synced, so they are not served as
+        a complete set. Returns {"inserted", "updated", "deleted"} counts.
+        """
+        incoming = {record["id"]: (record, _row_hash(record)) for record in records if record.get("id") is not None}
+        counts = {"inserted": 0, "updated": 0, "deleted": 0}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = dict(self._conn.execute(
+                    "SELECT id, row_hash FROM bookings WHERE account = ?", (account,)
+                ).fetchall())
+                for booking_id, (record, row_hash) in incoming.items():
+                    if existing.get(booking_id) == row_hash:
+                        continue
+                    counts["updated" if booking_id in existing else "inserted"] += 1
+                    self._write_booking(account, record, row_hash)
+                for booking_id in (existing.keys() - incoming.keys() if complete else ()):
+                    self._delete_booking(account, booking_id)
+                    counts["deleted"] += 1
+                if complete:
+                    self._mark_synced(account, "bookings")
+                else:
+                    self._conn.execute("DELETE FROM sync_state WHERE account = ? AND name = 'bookings'", (account,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def _records(self, account, rows):
+        if not rows:
+            return []
+        ids = [row[0] for row in rows]
+        attendees = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                for booking_id, email, name in self._conn.execute(
+                    f"SELECT booking_id, email, name FROM attendees WHERE account = ? AND booking_id IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                    (account, *chunk)
+                ):
+                    attendees.setdefault(booking_id, []).append({"email": email, "name": name})
+        return [{
+            "id": row[0],
+            "uid": row[1],
+            "title": row[2],
+            "description": row[3],
+            "startTime": row[4],
+            "endTime": row[5],
+            "status": row[6],
+            "eventTypeId": row[7],
+            "attendees": attendees.get(row[0], [])
+        } for row in rows]
+
+    def get_booking(self, account, booking_id):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_BOOKING_COLUMNS} FROM bookings b WHERE b.account = ? AND b.id = ?", (account, booking_id)
+            ).fetchall()
+        records = self._records(account, rows)
+        return records[0] if records else None
+
+    def find_bookings(self, account, email=None, start_date=None, end_date=None, status=None, limit=None):
+        """
+        Returns mirrored booking records matching the filters, ordered by start time.
+        start_date / end_date are inclusive date objects, compared against the start time's date.
+        """
+        query = f"SELECT {_BOOKING_COLUMNS} FROM bookings b"
+        args = [account]
+        where = ["b.account = ?"]
+        if email:
+            query += " JOIN attendees a ON a.account = b.account AND a.booking_id = b.id"
+            where.append("a.email_norm = ?")
+            args.append(email.lower())
+        if start_date:
+            where.append("substr(b.start_time, 1, 10) >= ?")
+            args.append(start_date.isoformat())
+        if end_date:
+            where.append("substr(b.start_time, 1, 10) <= ?")
+            args.append(end_date.isoformat())
+        if status:
+            where.append("lower(b.status) = ?")
+            args.append(status.lower())
+        query += " WHERE " + " AND ".join(where) + " GROUP BY b.id ORDER BY b.start_time, b.id"
+        if limit:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return self._records(account, rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
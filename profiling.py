@@ -0,0 +1,180 @@
+import asyncio
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# --- Profiling of chat turns ---
+# When enabled (PROFILE_TURNS=true or the sidebar toggle), a chat turn runs under cProfile, both in
+# the Streamlit script thread and on the agent loop thread (agent_stream.py), with a tracemalloc
+# snapshot before and after. The merged profile is saved to PROFILE_DIR (open it with
+# `python -m pstats` or snakeviz) next to a text report of the top functions and allocation sites.
+# The loop thread is shared, so a turn's profile also holds whatever other sessions ran meanwhile.
+# Only one turn is profiled at a time; concurrent turns run unprofiled.
+
+PROFILE_TURNS = os.getenv("PROFILE_TURNS", "false").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "15"))
+
+# Where time goes, by the file a function is defined in (first match wins). "waiting" is mostly the
+# script thread blocked on the agent loop's event queue; "imports" is lazy imports on a first turn.
+CATEGORIES = [
+    ("waiting", ("_thread.lock", "threading.py", "queue.py")),
+    ("imports", ("importlib", "builtins.compile", "marshal.")),
+    ("network", ("socket", "ssl", "selectors", "select.", "http/client", "httpx", "httpcore", "urllib3", "requests/", "anyio")),
+    ("json", ("json/", "json.", "orjson", "msgspec")),
+    ("llm client", ("openai/", "langchain_openai", "tiktoken")),
+    ("langchain", ("langchain", "pydantic")),
+    ("app", ("app.py", "cache.py", "mirror.py", "intents.py", "history.py", "response_cache.py")),
+]
+
+_profile_lock = threading.Lock()
+
+def _category(filename, function):
+    where = f"{filename}:{function}".replace("\\", "/")
+    for name, patterns in CATEGORIES:
+        if any(pattern in where for pattern in patterns):
+            return name
+    return "other"
+
+def _short_path(filename):
+    # Relative to the sys.path entry it was imported from, e.g. "langchain_core/prompts/chat.py".
+    for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+def _location(key):
+    filename, line, function = key
+    if filename == "~":
+        return function  # Built-in, e.g. "<method 'poll' of 'select.epoll' objects>"
+    return f"{_short_path(filename)}:{line}({function})"
+
+def top_functions(stats, n=PROFILE_TOP_N):
+    """
+    The n functions with the most own time: [{"function", "calls", "own_s", "cumulative_s"}].
+    """
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+    return [
+        {"function": _location(key), "calls": calls, "own_s": round(own, 4), "cumulative_s": round(cumulative, 4)}
+        for key, (_, calls, own, cumulative, _) in rows
+    ]
+
+def time_by_category(stats):
+    """
+    Own time summed per CATEGORIES entry, in seconds; time blocked in select/poll counts as network.
+    """
+    totals = {}
+    for (filename, _, function), (_, _, own, _, _) in stats.stats.items():
+        category = _category(filename, function)
+        totals[category] = totals.get(category, 0.0) + own
+    return {name: round(seconds, 4) for name, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+
+def top_allocations(before, after, n=PROFILE_TOP_N):
+    """
+    The n source lines whose allocations grew most between two tracemalloc snapshots.
+    """
+    diff = after.compare_to(before, "lineno")
+    return [
+        {"site": f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", "size_kib": round(stat.size_diff / 1024, 1), "count": stat.count_diff}
+        for stat in diff[:n] if stat.size_diff > 0
+    ]
+
+class TurnProfile:
+    """
+    Result of profile_turn(): filled in when the block exits, None fields when the turn was not profiled.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.seconds = None
+        self.categories = None
+        self.functions = None
+        self.allocations = None
+
+    def report(self):
+        lines = [f"Turn took {self.seconds:.3f} s", "", "Own time by category (s):"]
+        lines += [f"  {name:12} {seconds:8.4f}" for name, seconds in self.categories.items()]
+        lines += ["", "Top functions by own time:"]
+        lines += [f"  {row['own_s']:8.4f} {row['cumulative_s']:8.4f} {row['calls']:7} {row['function']}" for row in self.functions]
+        lines += ["", "Top allocation sites:"]
+        lines += [f"  {row['size_kib']:10.1f} KiB {row['count']:7} {row['site']}" for row in self.allocations]
+        return "\n".join(lines) + "\n"
+
+def _run_on_loop(loop, func):
+    done = threading.Event()
+
+    def call():
+        try:
+            func()
+        finally:
+            done.set()
+
+    loop.call_soon_threadsafe(call)
+    done.wait(5)
+
+@contextlib.contextmanager
+def profile_turn(enabled=PROFILE_TURNS, loop=None):
+    """
+    Profiles the block (and, if given, the asyncio `loop` running in another thread) and yields a
+    TurnProfile, filled in and saved to PROFILE_DIR on exit. Does nothing when disabled or when
+    another turn is already being profiled.
+    """
+    result = TurnProfile()
+    if not enabled or not _profile_lock.acquire(blocking=False):
+        yield result
+        return
+    started_tracemalloc = not tracemalloc.is_tracing()
+    try:
+        if started_tracemalloc:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        loop_profiler = cProfile.Profile() if loop is not None else None
+        if loop_profiler is not None:
+            _run_on_loop(loop, loop_profiler.enable)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            if loop_profiler is not None:
+                _run_on_loop(loop, loop_profiler.disable)
+            result.seconds = time.perf_counter() - started
+            after = tracemalloc.take_snapshot()
+            _save(result, profiler, loop_profiler, before, after)
+    finally:
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _profile_lock.release()
+
+def _save(result, profiler, loop_profiler, before, after):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    if loop_profiler is not None:
+        stats.add(loop_profiler)
+    result.categories = time_by_category(stats)
+    result.functions = top_functions(stats)
+    result.allocations = top_allocations(before, after)
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"turn-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}")
+    stats.dump_stats(base + ".prof")
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(result.report())
+    result.path = base + ".prof"
+
+def profile_coroutine(coroutine, loop):
+    """
+    Runs `coroutine` on `loop` (running in another thread) under profile_turn and returns
+    (result, TurnProfile); for profiling agent runs outside Streamlit.
+    """
+    with profile_turn(True, loop) as result:
+        value = asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+    return value, result
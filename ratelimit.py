@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+
+# --- Client-side rate limiting of Cal.com calls ---
+# Token buckets shared by every session of the process, and optionally by every process on the
+# machine (SQLite-backed buckets), so bursts from concurrent sessions queue here instead of
+# running into Cal.com's per-key limits. Reads and writes have separate budgets. Callers of one
+# kind are served in arrival order; writes may also borrow read tokens, and then go ahead of
+# queued reads.
+
+READ = "read"
+WRITE = "write"
+
+_PRIORITY = {WRITE: 0, READ: 1}
+_SOURCES = {WRITE: (WRITE, READ), READ: (READ,)}  # Buckets each kind may take a token from, in order
+_POLL_INTERVAL = 0.05  # Seconds between re-checks while queued, so queue changes are picked up
+
+class MemoryBuckets:
+    """
+    In-process bucket state.
+    """
+
+    def __init__(self):
+        self._state = {}  # name -> (tokens, updated_at)
+
+    def take(self, name, rate, burst, now):
+        """
+        Takes one token from bucket `name`. Returns 0.0 on success, else the seconds until one is available.
+        """
+        tokens, updated_at = self._state.get(name, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            self._state[name] = (tokens - 1, now)
+            return 0.0
+        self._state[name] = (tokens, now)
+        return (1 - tokens) / rate
+
+    def penalize(self, name, rate, burst, now, seconds):
+        """
+        Empties bucket `name` so that it only refills after `seconds`.
+        """
+        self._state[name] = (min(0.0, -seconds * rate), now)
+
+class SqliteBuckets:
+    """
+    Bucket state in a SQLite file, shared by every process using the same path.
+    Each take is one IMMEDIATE transaction, so processes cannot spend the same token twice.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def _update(self, name, burst, now, change):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE name = ?", (name,)).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens, result = change(tokens, max(0.0, now - updated_at))
+            self._conn.execute("INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)", (name, tokens, now))
+            self._conn.execute("COMMIT")
+            return result
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def take(self, name, rate, burst, now):
+        def change(tokens, elapsed):
+            tokens = min(burst, tokens + elapsed * rate)
+            if tokens >= 1:
+                return tokens - 1, 0.0
+            return tokens, (1 - tokens) / rate
+        return self._update(name, burst, now, change)
+
+    def penalize(self, name, rate, burst, now, seconds):
+        self._update(name, burst, now, lambda tokens, elapsed: (min(0.0, -seconds * rate), None))
+
+class RateLimiter:
+    """
+    Token-bucket limiter with a read and a write budget (requests per second and burst size).
+    A rate of 0 disables that budget. acquire() blocks, aacquire() is its coroutine version; both
+    give up after `timeout` seconds and return False. Buckets use the wall clock, so SQLite-backed
+    state is comparable across processes; queueing order is per process. With SQLite-backed
+    buckets, aacquire() takes tokens on a worker thread, since a take may wait on another
+    process's transaction.
+    """
+
+    def __init__(self, read_rate, read_burst, write_rate, write_burst, path=None):
+        self.limits = {READ: (read_rate, max(1.0, read_burst)), WRITE: (write_rate, max(1.0, write_burst))}
+        self._buckets = SqliteBuckets(path) if path else MemoryBuckets()
+        self._blocking = path is not None  # Taking a token does I/O, so keep it off the event loop
+        self._lock = threading.Lock()
+        self._waiting = []  # Heap of (priority, sequence, kind)
+        self._sequence = itertools.count()
+        self._stats = {kind: {"granted": 0, "waited": 0, "timeouts": 0, "wait_seconds": 0.0, "max_wait": 0.0} for kind in (READ, WRITE)}
+
+    def _enabled(self, kind):
+        return self.limits[kind][0] > 0
+
+    def _try_take(self, ticket):
+        """
+        Takes a token for a queued ticket if nobody queued ahead of it could use the same bucket.
+        Returns 0.0 on success, else the seconds to wait before trying again. Holds self._lock.
+        """
+        ahead = [other for other in self._waiting if other < ticket]
+        wait = None
+        for source in _SOURCES[ticket[2]]:
+            rate, burst = self.limits[source]
+            if rate <= 0:
+                continue
+            if any(source in _SOURCES[other[2]] for other in ahead):
+                continue
+            source_wait = self._buckets.take(source, rate, burst, time.time())
+            if source_wait == 0.0:
+                return 0.0
+            wait = source_wait if wait is None else min(wait, source_wait)
+        return min(wait if wait is not None else _POLL_INTERVAL, _POLL_INTERVAL)
+
+    def _enqueue(self, kind):
+        ticket = (_PRIORITY[kind], next(self._sequence), kind)
+        with self._lock:
+            heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _attempt(self, ticket):
+        with self._lock:
+            wait = self._try_take(ticket)
+            if wait == 0.0:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+        return wait
+
+    def _leave(self, ticket):
+        with self._lock:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+
+    def _record(self, kind, waited, granted):
+        with self._lock:
+            stats = self._stats[kind]
+            if not granted:
+                stats["timeouts"] += 1
+                return
+            stats["granted"] += 1
+            if waited > 0:
+                stats["waited"] += 1
+                stats["wait_seconds"] += waited
+                stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def acquire(self, kind, timeout=None):
+        if not self._enabled(kind):
+            return True
+        started = time.monotonic()
+        ticket = self._enqueue(kind)
+        queued = False
+        try:
+            while True:
+                wait = self._attempt(ticket)
+                waited = time.monotonic() - started if queued else 0.0
+                if wait == 0.0:
+                    self._record(kind, waited, True)
+                    return True
+                if timeout is not None and waited + wait > timeout:
+                    self._record(kind, waited, False)
+                    return False
+                queued = True
+                time.sleep(wait)
+        finally:
+            self._leave(ticket)
+
+    async def aacquire(self, kind, timeout=None):
+        if not self._enabled(kind):
+            return True
+        started = time.monotonic()
+        ticket = self._enqueue(kind)
+        queued = False
+        try:
+            while True:
+                wait = await asyncio.to_thread(self._attempt, ticket) if self._blocking else self._attempt(ticket)
+                waited = time.monotonic() - started if queued else 0.0
+                if wait == 0.0:
+                    self._record(kind, waited, True)
+                    return True
+                if timeout is not None and waited + wait > timeout:
+                    self._record(kind, waited, False)
+                    return False
+                queued = True
+                await asyncio.sleep(wait)
+        finally:
+            self._leave(ticket)
+
+    def penalize(self, kind, seconds):
+        """
+        Holds back `kind` requests for `seconds`, e.g. after Cal.com answered 429 with Retry-After,
+        so other sessions wait here instead of being rejected too.
+        """
+        rate, burst = self.limits[kind]
+        if rate > 0 and seconds > 0:
+            with self._lock:
+                self._buckets.penalize(kind, rate, burst, time.time(), seconds)
+
+    def stats(self):
+        """
+        Per kind: current queue depth, granted requests, how many had to wait, total and max wait
+        in seconds, and timeouts.
+        """
+        with self._lock:
+            result = {}
+            for kind, stats in self._stats.items():
+                result[kind] = {
+                    "queued": sum(1 for ticket in self._waiting if ticket[2] == kind),
+                    **stats,
+                    "avg_wait": stats["wait_seconds"] / stats["waited"] if stats["waited"] else 0.0
+                }
+            return result
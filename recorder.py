@@ -0,0 +1,192 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import message_to_dict, messages_to_dict
+
+# --- Recording of agent turns ---
+# With RECORD_TURNS_FILE set, every agent turn is appended to that file as one JSON line. A line
+# holds the user input, the agent inputs (chat history, date), each LLM request (messages in,
+# message out, token usage, time) and each tool call, plus every Cal.com HTTP exchange made by
+# app.py's request layer (method, endpoint, params without the API key, body, status, response
+# text, time) and the final answer. bench/replay.py replays these turns offline, with a stub LLM
+# and a mock Cal.com answering from the recording, as a performance regression test. Recordings
+# contain real conversation and booking data; keep them out of version control.
+
+RECORD_TURNS_FILE = os.getenv("RECORD_TURNS_FILE", "")  # Empty disables recording
+
+_current = contextvars.ContextVar("current_recording", default=None)
+_write_lock = threading.Lock()
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+class TurnRecording:
+    """
+    One agent turn being recorded; see record_turn(). Disabled recordings ignore everything.
+    """
+
+    def __init__(self, user_input, enabled=True):
+        self.enabled = enabled
+        self.user_input = user_input
+        self.recorded_at = _now()
+        self.inputs = None
+        self.llm = []
+        self.tools = []
+        self.cal = []
+        self.output = None
+        self.error = None
+        self.seconds = None
+
+    def set_inputs(self, inputs):
+        """
+        Records the agent inputs; only turns that reached the agent are saved.
+        """
+        if self.enabled:
+            self.inputs = {
+                "chat_history": messages_to_dict(inputs.get("chat_history") or []),
+                **{key: value for key, value in inputs.items() if key != "chat_history"}
+            }
+
+    def to_dict(self):
+        return {
+            "recorded_at": self.recorded_at,
+            "user_input": self.user_input,
+            "inputs": self.inputs,
+            "llm": self.llm,
+            "tools": self.tools,
+            "cal": self.cal,
+            "output": self.output,
+            "error": self.error,
+            "seconds": self.seconds
+        }
+
+class RecordingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler adding each LLM request and tool call of a run to a TurnRecording.
+    """
+
+    def __init__(self, recording):
+        self.recording = recording
+        self._llm = {}  # run_id -> (start time, messages)
+        self._tools = {}  # run_id -> (start time, name, input)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._llm[run_id] = (time.perf_counter(), messages_to_dict(messages[0]) if messages else [])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, messages = self._llm.pop(run_id, (None, None))
+        if started is None:
+            return
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        self.recording.llm.append({
+            "messages": messages,
+            "response": message_to_dict(message) if message is not None else None,
+            "seconds": time.perf_counter() - started
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._llm.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._tools[run_id] = (time.perf_counter(), name, input_str)
+
+    def _end_tool(self, run_id, output=None, error=None):
+        started, name, input_str = self._tools.pop(run_id, (None, None, None))
+        if started is None:
+            return
+        self.recording.tools.append({
+            "name": name,
+            "input": input_str,
+            "output": output,
+            "error": error,
+            "seconds": time.perf_counter() - started
+        })
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, output if isinstance(output, str) else str(getattr(output, "content", output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error=repr(error))
+
+def callback_config(recording, config=None):
+    """
+    Adds a RecordingCallbackHandler for `recording` to a run config (e.g. tracing.callback_config()).
+    """
+    if recording is None or not recording.enabled:
+        return config
+    config = dict(config or {})
+    config["callbacks"] = list(config.get("callbacks") or []) + [RecordingCallbackHandler(recording)]
+    return config
+
+def record_cal_exchange(method, endpoint, params, json_data, response, seconds):
+    """
+    Called by app.py for each Cal.com response (requests or httpx) received; does nothing unless
+    a turn is being recorded, so the body is only decoded then.
+    """
+    recording = _current.get()
+    if recording is None:
+        return
+    recording.cal.append({
+        "method": method,
+        "endpoint": endpoint,
+        "params": {key: value for key, value in (params or {}).items() if key != "apiKey"},
+        "json": json_data,
+        "status": response.status_code,
+        "body": response.text,
+        "seconds": seconds
+    })
+
+@contextlib.contextmanager
+def recording(user_input):
+    """
+    Makes a new TurnRecording current for the block, so Cal.com exchanges are added to it, and
+    yields it. Nothing is saved; see record_turn().
+    """
+    current = TurnRecording(user_input)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.seconds = time.perf_counter() - started
+        _current.reset(token)
+
+@contextlib.contextmanager
+def record_turn(user_input, path=RECORD_TURNS_FILE):
+    """
+    Records a chat turn and appends it to `path` when it reached the agent (set_inputs was called).
+    Yields a disabled TurnRecording when `path` is empty.
+    """
+    if not path:
+        yield TurnRecording(user_input, enabled=False)
+        return
+    current = None
+    try:
+        with recording(user_input) as current:
+            yield current
+    finally:
+        if current is not None and current.inputs is not None:
+            save(current, path)
+
+def save(turn, path=RECORD_TURNS_FILE):
+    line = json.dumps(turn.to_dict(), default=str)
+    with _write_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+def load(path):
+    """
+    Returns the recorded turns in `path`, oldest first.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
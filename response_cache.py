@@ -0,0 +1,219 @@
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# --- Response cache for read-only agent questions ---
+# Many sessions ask near-identical read-only questions ("what event types do you have?").
+# Answers are cached under the normalized question and the current date, together with the
+# app.data_versions() counters of the data their tools read, and are only served while those
+# counters have not moved and the entry is younger than RESPONSE_CACHE_TTL. Near-identical
+# wording is matched by embedding similarity, but only when the concrete values in the question
+# (numbers, emails, dates, slugs, weekdays) and the negations are the same, since n-gram
+# similarity scores "public" and "not public" as near-duplicates. Questions that book, cancel,
+# reschedule or create anything are never cached.
+# The cache is shared by all sessions, so an answer is only stored when every tool argument came
+# from the question itself. A follow-up such as "what about next week?" runs with emails or IDs
+# from earlier turns of its own session, and the same words from another session must not get that answer.
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))  # Seconds
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.9"))  # Min cosine similarity for a fuzzy hit
+RESPONSE_CACHE_EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL")  # Optional sentence-transformers model name
+
+# The app.data_versions() counters each read-only tool answers from.
+READ_TOOL_SOURCES = {
+    "list_event_types": ("event_types",),
+    "get_available_slots": ("slots",),
+    "list_cal_events": ("bookings",)
+}
+
+_WRITE_RE = re.compile(r"\b(?:book|books|booking a|schedule|reschedule|move|cancel|delete|remove|create|add|set up|make)\b")
+_FILLER_RE = re.compile(r"\b(?:please|pls|hi|hey|hello|thanks|thank you|can you|could you|would you|tell me|show me|me)\b")
+_PUNCT_RE = re.compile(r"[^\w@.+:/-]+")
+_ENTITY_RE = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+|\b[\w-]*\d[\w:/-]*\b|\b\w+(?:-\w+)+\b"
+    r"|\b(?:today|tonight|tomorrow|yesterday|next|last|this|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|week|weekend|month|morning|afternoon|evening|cancelled|canceled|accepted|pending|rejected|past|upcoming)\b"
+)
+# Tool arguments that carry no account data and may be picked by the agent.
+_FREE_ARGS = {"limit"}
+# Dates the agent can resolve from the question's wording and today's date, which entries are keyed on.
+_RELATIVE_DATE_RE = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+    r"|(?:this|next|last) (?:week|weekend|month))\b"
+)
+_DATE_ARG_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# After normalize_query, "isn't" reads "isn t".
+_NEGATION_RE = re.compile(r"\b(?:not|no|never|without|except|excluding|none|nothing|nobody|cannot|\w+n t)\b")
+
+def normalize_query(text):
+    text = _FILLER_RE.sub(" ", text.lower())
+    return " ".join(_PUNCT_RE.sub(" ", text).strip(" .").split())
+
+def is_write_query(text):
+    """
+    True if the question may book, cancel, reschedule or create something.
+    """
+    return bool(_WRITE_RE.search(text.lower()))
+
+def args_from_query(query, tool_calls):
+    """
+    True if every argument of `tool_calls` ([(tool name, args dict)]) is stated in `query`, apart
+    from `limit` and dates when the question names a relative day ("tomorrow", "next week").
+    """
+    text = query.lower()
+    relative_dates = bool(_RELATIVE_DATE_RE.search(text))
+    for _, args in tool_calls:
+        if not isinstance(args, dict):
+            return False
+        for name, value in args.items():
+            if value is None or name in _FREE_ARGS:
+                continue
+            value = str(value).lower()
+            if relative_dates and _DATE_ARG_RE.match(value):
+                continue
+            if value not in text:
+                return False
+    return True
+
+def _entities(normalized):
+    return frozenset(_ENTITY_RE.findall(normalized))
+
+def _negations(normalized):
+    return len(_NEGATION_RE.findall(normalized))
+
+def hashed_embedding(text, dimensions=1024):
+    """
+    Default embedding: hashed word unigrams and character trigrams, as a sparse {index: weight} vector.
+    """
+    features = text.split()
+    padded = f" {text} "
+    features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    vector = {}
+    for feature in features:
+        index = zlib.crc32(feature.encode("utf-8")) % dimensions
+        vector[index] = vector.get(index, 0.0) + 1.0
+    return vector
+
+def _local_model_embedding(model_name):
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True).tolist()
+
+def _as_sparse(vector):
+    return vector if isinstance(vector, dict) else dict(enumerate(vector))
+
+def cosine_similarity(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(index, 0.0) for index, weight in a.items())
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm if norm else 0.0
+
+class ResponseCache:
+    """
+    LRU cache of agent answers. `embed_fn(text)` returns a dense list of floats or a sparse
+    {index: weight} dict; it defaults to RESPONSE_CACHE_EMBED_MODEL (a local sentence-transformers
+    model) when set, else hashed_embedding.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, similarity=RESPONSE_CACHE_SIMILARITY, embed_fn=None):
+        if embed_fn is None:
+            embed_fn = _local_model_embedding(RESPONSE_CACHE_EMBED_MODEL) if RESPONSE_CACHE_EMBED_MODEL else hashed_embedding
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.embed_fn = embed_fn
+        self._entries = OrderedDict()  # (normalized query, date) -> entry dict
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def _valid(self, entry, versions, now):
+        if now - entry["stored_at"] > self.ttl:
+            return False
+        return all(versions.get(source) == version for source, version in entry["versions"].items())
+
+    def lookup(self, query, today, versions):
+        """
+        Returns the cached answer for `query` asked on `today` (a date string), or None.
+        `versions` is the current app.data_versions().
+        """
+        if is_write_query(query):
+            return None
+        normalized = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((normalized, today))
+            if entry is not None and self._valid(entry, versions, now):
+                self._entries.move_to_end((normalized, today))
+                self.hits += 1
+                return entry["response"]
+        # Fuzzy match outside the lock, as embedding may be slow with a local model.
+        embedding = _as_sparse(self.embed_fn(normalized))
+        entities = _entities(normalized)
+        negations = _negations(normalized)
+        with self._lock:
+            best_key, best_score = None, self.similarity
+            for key, entry in self._entries.items():
+                if key[1] != today or entry["entities"] != entities or entry["negations"] != negations:
+                    continue
+                if not self._valid(entry, versions, now):
+                    continue
+                score = cosine_similarity(embedding, entry["embedding"])
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.fuzzy_hits += 1
+            return self._entries[best_key]["response"]
+
+    def store(self, query, today, tool_calls, versions, response):
+        """
+        Caches `response` if the turn only used read-only tools (at least one), all of them with
+        arguments taken from the question (see args_from_query). `tool_calls` is [(tool name, args)].
+        `versions` must be app.data_versions() as read after the agent ran: the turn's own tools
+        may load data (e.g. fill the booking index), which moves the counters. A change made by
+        another session during the run can go unnoticed until RESPONSE_CACHE_TTL expires.
+        Returns True if the answer was cached.
+        """
+        if not response or not tool_calls or is_write_query(query):
+            return False
+        if any(tool not in READ_TOOL_SOURCES for tool, _ in tool_calls):
+            return False
+        if not args_from_query(query, tool_calls):
+            return False
+        sources = {source for tool, _ in tool_calls for source in READ_TOOL_SOURCES[tool]}
+        normalized = normalize_query(query)
+        entry = {
+            "response": response,
+            "versions": {source: versions.get(source) for source in sources},
+            "embedding": _as_sparse(self.embed_fn(normalized)),
+            "entities": _entities(normalized),
+            "negations": _negations(normalized),
+            "stored_at": time.monotonic()
+        }
+        with self._lock:
+            self._entries[(normalized, today)] = entry
+            self._entries.move_to_end((normalized, today))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def hit_rate(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "fuzzy_hits": self.fuzzy_hits, "misses": self.misses, "size": len(self._entries)}
@@ -3,19 +3,32 @@ from datetime import datetime
 from dotenv import load_dotenv
 import os
 
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
+import agent_stream
 import app
+import history
+import intents
+import metrics
+import profiling
+import recorder
+import response_cache
+import tracing
+import webhook
 
 load_dotenv()
 
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CAL_API_KEY = os.getenv("CAL_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo-0125")
 
+# Receive Cal.com booking webhooks in this process, so the tool caches stay fresh without polling.
+if webhook.CAL_WEBHOOK_SECRET:
+    webhook.start_background_server()
+
+# Export latency metrics for Prometheus on a local port (METRICS_PORT=0 turns this off).
+metrics.start_background_server()
 
 # --- Streamlit UI Setup ---
 st.set_page_config(page_title="Cal.com Chatbot", layout="centered")
@@ -43,44 +56,110 @@ if "messages" not in st.session_state:
         AIMessage(content="Hello! I am your Cal.com assistant. How can I help you manage your events?")
     ]
 
-# Initialize the Langchain ChatOpenAI model
-llm = ChatOpenAI(model="gpt-3.5-turbo-0125", temperature=0, openai_api_key=OPENAI_API_KEY)
-
-tools = [
-    app.list_event_types,
-    app.get_available_slots,
-    app.book_cal_event,
-    app.list_cal_events,
-    app.cancel_cal_event,
-    app.reschedule_cal_event,
-    app.create_cal_event_type
-]
-
-current_date_str = datetime.now().strftime("%Y-%m-%d")
-
-prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            f"You are a helpful Cal.com assistant. Current date is {current_date_str}. Use this for relative date references like 'today' or 'tomorrow'. "
-            "You can list event types, check availability, book, list, cancel, and reschedule events. "
-            "Always ask for all necessary details (like email for listing events, or event type, exact date, start time, end time, name, email, and event title for booking) before calling a tool. "
-            "For dates and times, always ask the user to provide them in a clear format, like 'YYYY-MM-DD HH:MM:SS'. "
-            "Convert user-provided dates and times to ISO 8601 format (e.g., 'YYYY-MM-DDTHH:MM:SSZ' for UTC or 'YYYY-MM-DDTHH:MM:SS-07:00' for specific offset) before passing to tools. "
-            "Assume 'America/Los_Angeles' timezone for converting user input to ISO 8601, unless the user explicitly states another timezone. "
-            "For booking, rescheduling, and canceling, explicitly ask for user confirmation before executing the action. "
-            "When listing events, if the user doesn't provide an email, ask for it to filter results. "
-            "When suggesting event types, use their 'title' and 'slug' from `list_event_types`. "
-            "When asking for event ID for cancellation or rescheduling, clearly state that the ID can be found by listing events. "
-            "The `book_cal_event` and `reschedule_cal_event` tools require `event_type_id`. You can get event types and their IDs using `list_event_types`. Always ensure you have the `event_type_id` before attempting to book or reschedule. "
-            "If an API call returns an error, inform the user about the error details returned by the tool."
-        ),
-        MessagesPlaceholder(variable_name="chat_history"),
-        MessagesPlaceholder(variable_name="agent_scratchpad"),
-    ]
+SYSTEM_PROMPT = (
+    "You are a helpful Cal.com assistant. Current date is {current_date}. Use this for relative date references like 'today' or 'tomorrow'. "
+    "You can list event types, check availability, book, list, cancel, and reschedule events. "
+    "Always ask for all necessary details (like email for listing events, or event type, exact date, start time, end time, name, email, and event title for booking) before calling a tool. "
+    "For dates and times, always ask the user to provide them in a clear format, like 'YYYY-MM-DD HH:MM:SS'. "
+    "Convert user-provided dates and times to ISO 8601 format (e.g., 'YYYY-MM-DDTHH:MM:SSZ' for UTC or 'YYYY-MM-DDTHH:MM:SS-07:00' for specific offset) before passing to tools. "
+    "Assume 'America/Los_Angeles' timezone for converting user input to ISO 8601, unless the user explicitly states another timezone. "
+    "For booking, rescheduling, and canceling, explicitly ask for user confirmation before executing the action. "
+    "When listing events, if the user doesn't provide an email, ask for it to filter results. "
+    "When suggesting event types, use their 'title' and 'slug' from `list_event_types`. "
+    "When asking for event ID for cancellation or rescheduling, clearly state that the ID can be found by listing events. "
+    "The `book_cal_event` and `reschedule_cal_event` tools require `event_type_id`. You can get event types and their IDs using `list_event_types`. Always ensure you have the `event_type_id` before attempting to book or reschedule. "
+    "If an API call returns an error, inform the user about the error details returned by the tool."
+)
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a user and a Cal.com scheduling assistant. "
+    "Keep it under 120 words. Keep names, emails, event types, dates, times, booking IDs and decisions; drop small talk."
 )
-agent = create_openai_tools_agent(llm, tools, prompt)
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+
+@st.cache_resource(show_spinner=False)
+def get_llm(openai_api_key, model):
+    from langchain_openai import ChatOpenAI
+
+    # Initialize the Langchain ChatOpenAI model
+    # stream_usage reports token counts for streamed responses too (see tracing.py).
+    return ChatOpenAI(model=model, temperature=0, openai_api_key=openai_api_key, streaming=True, stream_usage=True,
+                      callbacks=[metrics.LLMTimingHandler()])
+
+@st.cache_resource(show_spinner=False)
+def get_agent_executor(openai_api_key, model):
+    """
+    Builds the LLM, tools, prompt and AgentExecutor once per process and configuration.
+    Streamlit reruns the whole script on every interaction, so this must not be rebuilt per rerun.
+    The current date is a prompt variable, filled in on each invoke.
+    """
+    from langchain.agents import create_openai_tools_agent
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    from tool_executor import ConcurrentAgentExecutor
+
+    llm = get_llm(openai_api_key, model)
+
+    # The async variants, so tool calls run on the agent loop without blocking it.
+    tools = app.ASYNC_TOOLS
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT),
+            MessagesPlaceholder(variable_name="chat_history"),
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ]
+    )
+    agent = create_openai_tools_agent(llm, tools, prompt)
+    # Independent tool calls from the same step run in parallel, capped per run.
+    return ConcurrentAgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+
+def summarize_history(previous_summary, messages):
+    """
+    LLM summarizer for history.ChatHistoryManager; falls back to the extractive one on errors.
+    """
+    transcript = "\n".join(
+        f"{'User' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}" for m in messages
+    )
+    try:
+        response = get_llm(OPENAI_API_KEY, OPENAI_MODEL).invoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}")
+        ])
+        return response.content
+    except Exception:
+        return history.default_summarizer(previous_summary, messages)
+
+@st.cache_resource(show_spinner=False)
+def get_intent_router():
+    return intents.IntentRouter()
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    # Shared by all sessions of this process.
+    return response_cache.ResponseCache()
+
+if "history" not in st.session_state:
+    st.session_state.history = history.ChatHistoryManager(summarizer=summarize_history)
+if "router_state" not in st.session_state:
+    st.session_state.router_state = {}
+if "awaiting_answer" not in st.session_state:
+    # True when the agent's last turn called no tool: it asked for missing details or for a confirmation.
+    st.session_state.awaiting_answer = False
+
+with st.sidebar:
+    st.markdown("---")
+    st.caption(f"Fast-path hit rate: {get_intent_router().hit_rate():.0%}")
+    st.caption(f"Response cache hit rate: {get_response_cache().hit_rate():.0%}")
+    latency = metrics.summary()
+    for label, key in (("Cal.com requests", "cal"), ("Tool calls", "tools"), ("LLM calls", "llm")):
+        stats = latency[key]
+        if stats["count"]:
+            st.caption(f"{label}: p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms ({stats['count']})")
+    unavailable = [group for group, stats in app.circuit_stats().items() if stats["state"] != "closed"]
+    if unavailable:
+        st.warning(f"Cal.com is not responding ({', '.join(unavailable)}); showing cached data where possible.")
+    # Profile each turn (cProfile + tracemalloc) and show where the time went; see profiling.py.
+    profile_turns = st.toggle("Profile turns", value=profiling.PROFILE_TURNS)
 
 # --- Chat Display Area ---
 for message in st.session_state.messages:
@@ -103,15 +182,87 @@ if user_query := st.chat_input("Ask me anything about your Cal.com events..."):
             st.warning("Please set your Cal.com API key in the .env file to proceed.")
         st.session_state.messages.append(AIMessage(content="Please set your Cal.com API key in the .env file to proceed."))
     else:
-        with st.chat_message("assistant"):
+        with st.chat_message("assistant"), \
+                profiling.profile_turn(profile_turns, agent_stream.get_event_loop()) as profile, \
+                tracing.span("chat.turn", **{"chat.query_chars": len(user_query)}) as turn, \
+                recorder.record_turn(user_query) as recording:
             try:
-                response = agent_executor.invoke(
-                    {"chat_history": st.session_state.messages}
-                )
-                ai_response_content = response["output"]
-                st.markdown(ai_response_content)
-                st.session_state.messages.append(AIMessage(content=ai_response_content))
-            except Exception as e:
-                error_message = f"An error occurred while processing your request: {e}. Please try again or rephrase your request."
-                st.error(error_message)
-                st.session_state.messages.append(AIMessage(content=error_message))
+                # Simple, fully specified commands are answered locally without the LLM.
+                fast_reply = get_intent_router().route(user_query, st.session_state.router_state)
+            except Exception:
+                fast_reply = None
+            current_date = datetime.now().strftime("%Y-%m-%d")
+            data_versions = app.data_versions()
+            # Only standalone questions use the response cache: not answers to the agent asking for
+            # missing details or a confirmation, nor replies to a pending fast-path confirmation.
+            standalone = fast_reply is None and not st.session_state.awaiting_answer and not st.session_state.router_state
+            cached_reply = get_response_cache().lookup(user_query, current_date, data_versions) if standalone else None
+            turn.set_attributes({"fast_path.hit": fast_reply is not None, "response_cache.hit": cached_reply is not None})
+            if fast_reply is not None or cached_reply is not None:
+                reply = fast_reply if fast_reply is not None else cached_reply
+                st.markdown(reply)
+                st.session_state.messages.append(AIMessage(content=reply))
+                st.session_state.awaiting_answer = False
+                st.session_state.history.compact(st.session_state.messages)
+            else:
+                try:
+                    agent_executor = get_agent_executor(OPENAI_API_KEY, OPENAI_MODEL)
+                    chat_history = st.session_state.history.build(st.session_state.messages)
+                    inputs = {"chat_history": chat_history, "current_date": current_date}
+                    turn.set_attribute("chat.history_messages", len(chat_history))
+                    recording.set_inputs(inputs)
+
+                    # Stream tokens into the bubble as they arrive and show tool progress above it.
+                    status = None
+                    placeholder = st.empty()
+                    streamed_text = ""
+                    ai_response_content = None
+                    tool_calls = []  # (tool name, args), for the response cache
+                    for event in agent_stream.stream_agent_events(agent_executor, inputs,
+                                                                    recorder.callback_config(recording, tracing.callback_config(turn))):
+                        if event[0] == "token":
+                            streamed_text += event[1]
+                            placeholder.markdown(streamed_text + "▌")
+                        elif event[0] == "tool_start":
+                            tool_calls.append((event[1], event[2]))
+                            # Text streamed before a tool call belongs to an intermediate step.
+                            streamed_text = ""
+                            placeholder.empty()
+                            if status is None:
+                                status = st.status(agent_stream.tool_status(event[1]))
+                            else:
+                                status.update(label=agent_stream.tool_status(event[1]), state="running")
+                            status.write(agent_stream.tool_status(event[1]))
+                        elif event[0] == "output":
+                            ai_response_content = event[1]
+                    if status is not None:
+                        status.update(label="Done", state="complete")
+
+                    if ai_response_content is None:
+                        ai_response_content = streamed_text
+                    placeholder.markdown(ai_response_content)
+                    recording.output = ai_response_content
+                    st.session_state.messages.append(AIMessage(content=ai_response_content))
+                    st.session_state.awaiting_answer = not tool_calls
+                    if standalone:
+                        # Versions as of now: the data this turn's own tools loaded is what the answer is built from.
+                        get_response_cache().store(user_query, current_date, tool_calls, app.data_versions(), ai_response_content)
+                    # Fold turns that left the window into the summary, after the reply is on screen.
+                    st.session_state.history.compact(st.session_state.messages)
+                except Exception as e:
+                    turn.record_error(e)
+                    recording.error = repr(e)
+                    error_message = f"An error occurred while processing your request: {e}. Please try again or rephrase your request."
+                    st.error(error_message)
+                    st.session_state.awaiting_answer = False
+                    st.session_state.messages.append(AIMessage(content=error_message))
+
+        if profile.path:
+            with st.expander(f"Turn profile ({profile.seconds:.2f} s)"):
+                st.caption(f"Saved to `{profile.path}`")
+                st.markdown("**Own time by category**")
+                st.table([{"category": name, "seconds": seconds} for name, seconds in profile.categories.items()])
+                st.markdown("**Hot functions**")
+                st.table(profile.functions)
+                st.markdown("**Allocation sites**")
+                st.table(profile.allocations)
@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import AgentExecutor
+
+# --- Concurrent tool calls within one agent step ---
+# When the model asks for several tools in one step (e.g. list_event_types and list_cal_events,
+# or get_available_slots for several event types), ConcurrentAgentExecutor runs them in parallel:
+# on a thread pool for sync runs (invoke/stream) and with asyncio for async runs
+# (ainvoke/astream_events). At most AGENT_TOOL_CONCURRENCY calls of one run are in flight at once,
+# and results are always returned in the order the model asked for them.
+
+AGENT_TOOL_CONCURRENCY = int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
+
+# One semaphore per agent run, alive while that run has tool calls waiting or in flight.
+_run_semaphores = weakref.WeakValueDictionary()
+
+class _DeferredStep:
+    """
+    A tool call that AgentExecutor._iter_next_step asked for but that has not been run yet.
+    """
+
+    def __init__(self, perform):
+        self.perform = perform
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    max_concurrency: int = AGENT_TOOL_CONCURRENCY
+
+    # --- Sync runs: thread pool ---
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # Only record the call here; _iter_next_step runs all calls of the step together.
+        parent = super()._perform_agent_action
+        return _DeferredStep(lambda: parent(name_to_tool_map, color_mapping, agent_action, run_manager))
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        deferred = []
+        for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager):
+            if isinstance(item, _DeferredStep):
+                deferred.append(item)
+            else:
+                yield item
+        if len(deferred) <= 1 or self.max_concurrency <= 1:
+            for step in deferred:
+                yield step.perform()
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(deferred)), thread_name_prefix="agent-tool") as pool:
+            # Each call gets a copy of the caller's context (callbacks, tracing).
+            futures = [pool.submit(contextvars.copy_context().run, step.perform) for step in deferred]
+            for future in futures:
+                yield future.result()
+
+    # --- Async runs: AgentExecutor already gathers the calls of a step, in order; cap them per run ---
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        if self.max_concurrency <= 0 or run_manager is None:
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        semaphore = _run_semaphores.get(run_manager.run_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            _run_semaphores[run_manager.run_id] = semaphore
+        async with semaphore:
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
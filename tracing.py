@@ -0,0 +1,368 @@
+import contextlib
+import contextvars
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# --- Tracing of chat turns ---
+# Spans for one chat turn: the turn itself (streamlit.py), the agent run, each LLM request, each
+# tool call and each Cal.com request (app.py), with token counts and cache-hit attributes, so the
+# critical path of a slow turn can be found. Set TRACING_EXPORTER to "console" (stdout) or "file"
+# (one JSON span per line in TRACING_FILE). When the OpenTelemetry SDK is installed the spans are
+# real OpenTelemetry spans; otherwise a built-in tracer writes the same JSON shape as the SDK's
+# ConsoleSpanExporter. With TRACING_EXPORTER=none (the default) spans cost next to nothing.
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()  # "none", "console" or "file"
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "calbot")
+
+ENABLED = TRACING_EXPORTER in ("console", "file")
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # Optional dependency; the built-in tracer is used instead
+    otel_trace = None
+
+_current = contextvars.ContextVar("current_span", default=None)
+_output = None
+_output_lock = threading.Lock()
+_otel_tracer = None
+
+def _attribute_value(value):
+    # OpenTelemetry attributes are str, bool, int or float.
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+def _get_output():
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = sys.stdout if TRACING_EXPORTER == "console" else open(TRACING_FILE, "a", encoding="utf-8")
+        return _output
+
+def _get_otel_tracer():
+    global _otel_tracer
+    if _otel_tracer is None:
+        provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+        exporter = ConsoleSpanExporter(out=_get_output(), formatter=lambda span: span.to_json(indent=None) + "\n")
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        _otel_tracer = provider.get_tracer("calbot")
+    return _otel_tracer
+
+def _timestamp(ns):
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def add_event(self, name, attributes=None):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """
+    A span of the built-in tracer, written out as one JSON line when it ends.
+    """
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if isinstance(parent, Span) else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if isinstance(parent, Span) else None
+        self.start_time = time.time_ns()
+        self.attributes = {}
+        self.events = []
+        self.status = {"status_code": "UNSET"}
+        self.set_attributes(attributes or {})
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = _attribute_value(value)
+
+    def set_attributes(self, attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name, attributes=None):
+        self.events.append({
+            "name": name,
+            "timestamp": _timestamp(time.time_ns()),
+            "attributes": {k: _attribute_value(v) for k, v in (attributes or {}).items() if v is not None}
+        })
+
+    def record_error(self, error):
+        self.status = {"status_code": "ERROR", "description": f"{type(error).__name__}: {error}"}
+
+    def end(self):
+        record = {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.trace_id}", "span_id": f"0x{self.span_id}"},
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _timestamp(self.start_time),
+            "end_time": _timestamp(time.time_ns()),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+            "resource": {"attributes": {"service.name": TRACING_SERVICE_NAME}}
+        }
+        output = _get_output()
+        with _output_lock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+class _OtelSpan:
+    """
+    Adapter giving an OpenTelemetry span the interface of Span.
+    """
+
+    def __init__(self, name, parent=None, attributes=None):
+        context = otel_trace.set_span_in_context(parent.span) if isinstance(parent, _OtelSpan) else None
+        self.span = _get_otel_tracer().start_span(name, context=context)
+        self.set_attributes(attributes or {})
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.span.set_attribute(key, _attribute_value(value))
+
+    def set_attributes(self, attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name, attributes=None):
+        self.span.add_event(name, {k: _attribute_value(v) for k, v in (attributes or {}).items() if v is not None})
+
+    def record_error(self, error):
+        self.span.record_exception(error)
+        self.span.set_status(Status(StatusCode.ERROR, f"{type(error).__name__}: {error}"))
+
+    def end(self):
+        self.span.end()
+
+def start_span(name, parent=None, attributes=None):
+    """
+    Starts a span under `parent` (default: the current span). The caller must end() it;
+    prefer span() where the work fits in one block.
+    """
+    if not ENABLED:
+        return _NOOP_SPAN
+    parent = parent if parent is not None else _current.get()
+    return (_OtelSpan if otel_trace is not None else Span)(name, parent, attributes)
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Runs the block in a child span of the current span, which becomes current inside it.
+    Exceptions mark the span as failed and propagate.
+    """
+    if not ENABLED:
+        yield _NOOP_SPAN
+        return
+    current = start_span(name, attributes=attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+def current_span():
+    return _current.get() or _NOOP_SPAN
+
+def set_attributes(**attributes):
+    """
+    Sets attributes on the current span, e.g. cache hits from inside a tool.
+    """
+    current_span().set_attributes(attributes)
+
+def _token_usage(response):
+    """
+    Returns (prompt, completion, total) token counts of an LLMResult, or Nones when not reported.
+    """
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if not usage:
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    return metadata.get("input_tokens"), metadata.get("output_tokens"), metadata.get("total_tokens")
+    return usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens")
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler turning one agent run into spans under `parent`: the run itself,
+    each LLM request and each tool call. A tool's span is made current while the tool runs, so
+    the Cal.com request spans opened inside it become its children.
+    """
+
+    run_inline = True  # Needed so the tool span set on start is visible inside the tool's context
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._spans = {}  # run_id -> (span, owned); nested chains map to the span of their ancestor
+        self._previous = {}  # tool run_id -> span that was current before it
+
+    def _parent_span(self, parent_run_id):
+        entry = self._spans.get(parent_run_id)
+        return entry[0] if entry else self.parent
+
+    def _open(self, run_id, parent_run_id, name, attributes):
+        self._spans[run_id] = (start_span(name, parent=self._parent_span(parent_run_id), attributes=attributes), True)
+
+    def _close(self, run_id, error=None, attributes=None):
+        entry = self._spans.pop(run_id, None)
+        if entry is None or not entry[1]:
+            return
+        span, _ = entry
+        if attributes:
+            span.set_attributes(attributes)
+        if error is not None:
+            span.record_error(error)
+        span.end()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._open(run_id, None, "agent.run", {"agent.name": kwargs.get("name")})
+        else:
+            self._spans[run_id] = (self._parent_span(parent_run_id), False)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+
+    def _llm_start(self, serialized, run_id, parent_run_id, kwargs, message_count):
+        params = kwargs.get("invocation_params") or {}
+        self._open(run_id, parent_run_id, "llm.request", {
+            "llm.model": params.get("model_name") or params.get("model") or (serialized or {}).get("name"),
+            "llm.messages": message_count
+        })
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs, len(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._llm_start(serialized, run_id, parent_run_id, kwargs, sum(len(batch) for batch in messages))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens, completion_tokens, total_tokens = _token_usage(response)
+        self._close(run_id, attributes={
+            "llm.prompt_tokens": prompt_tokens,
+            "llm.completion_tokens": completion_tokens,
+            "llm.total_tokens": total_tokens
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._open(run_id, parent_run_id, f"tool.{name}", {"tool.name": name, "tool.input_chars": len(input_str or "")})
+        self._previous[run_id] = _current.get()
+        _current.set(self._spans[run_id][0])
+
+    def _end_tool(self, run_id, error=None, attributes=None):
+        if run_id in self._previous:
+            _current.set(self._previous.pop(run_id))
+        self._close(run_id, error, attributes)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        text = output if isinstance(output, str) else str(getattr(output, "content", output))
+        self._end_tool(run_id, attributes={
+            "tool.output_chars": len(text),
+            "tool.error": text.startswith('{"error"'),
+            "tool.stale": '"stale":true' in text
+        })
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, error)
+
+def callback_config(parent):
+    """
+    Run config attaching a TracingCallbackHandler under `parent`; None when tracing is off.
+    """
+    if not ENABLED:
+        return None
+    return {"callbacks": [TracingCallbackHandler(parent)]}
+
+# --- Reading traces ---
+# Prints the span tree of the slowest traces in a TRACING_FILE, with durations, so the critical
+# path of a slow turn stands out:
+#   python tracing.py traces.jsonl --slowest 3
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def load_traces(path):
+    """
+    Returns {trace_id: [span dicts]} from a file of JSON spans, one per line.
+    """
+    traces = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                record["duration_ms"] = (_parse_time(record["end_time"]) - _parse_time(record["start_time"])).total_seconds() * 1000
+                traces.setdefault(record["context"]["trace_id"], []).append(record)
+    return traces
+
+def format_trace(spans):
+    """
+    Renders a trace as an indented tree, children in start order, with each span's duration and attributes.
+    """
+    ids = {record["context"]["span_id"] for record in spans}
+    children = {}
+    for record in sorted(spans, key=lambda r: r["start_time"]):
+        parent = record["parent_id"] if record["parent_id"] in ids else None
+        children.setdefault(parent, []).append(record)
+    lines = []
+
+    def walk(parent, depth):
+        for record in children.get(parent, []):
+            attributes = " ".join(f"{k}={v}" for k, v in record["attributes"].items())
+            error = " ERROR" if record["status"].get("status_code") == "ERROR" else ""
+            lines.append(f"{'  ' * depth}{record['name']} {record['duration_ms']:.1f} ms{error} {attributes}".rstrip())
+            walk(record["context"]["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the slowest traces in a trace file")
+    parser.add_argument("path", nargs="?", default=TRACING_FILE)
+    parser.add_argument("--slowest", type=int, default=3)
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    slowest = sorted(traces.values(), key=lambda spans: max(r["duration_ms"] for r in spans), reverse=True)
+    for spans in slowest[:args.slowest]:
+        print(format_trace(spans))
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import app
+
+# --- Cal.com webhook receiver ---
+# Accepts BOOKING_CREATED / BOOKING_CANCELLED / BOOKING_RESCHEDULED webhooks and applies them to the
+# caches in app.py (see app.apply_webhook_event), so they stay fresh without polling Cal.com.
+# The caches are in-process, so the receiver runs inside the Streamlit process (see
+# start_background_server). Point a Cal.com webhook at http://<host>:<port>/ with the same secret.
+
+CAL_WEBHOOK_SECRET = os.getenv("CAL_WEBHOOK_SECRET")
+CAL_WEBHOOK_HOST = os.getenv("CAL_WEBHOOK_HOST", "127.0.0.1")
+CAL_WEBHOOK_PORT = int(os.getenv("CAL_WEBHOOK_PORT", "8765"))
+
+SIGNATURE_HEADER = "X-Cal-Signature-256"
+
+_server = None
+_server_lock = threading.Lock()
+_logger = logging.getLogger(__name__)
+
+def sign(body, secret):
+    """
+    Returns the hex HMAC-SHA256 of the raw request body, as sent by Cal.com in X-Cal-Signature-256.
+    """
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+def verify_signature(body, signature, secret):
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret), signature)
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    secret = CAL_WEBHOOK_SECRET
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not verify_signature(body, self.headers.get(SIGNATURE_HEADER), self.secret):
+            return self._reply(401, {"error": "Invalid or missing webhook signature."})
+        try:
+            event = json.loads(body)
+            result = app.apply_webhook_event(event.get("triggerEvent"), event.get("payload") or {})
+        except (ValueError, AttributeError) as e:
+            return self._reply(400, {"error": f"Invalid webhook payload: {e}"})
+        self._reply(200, result)
+
+    def log_message(self, format, *args):
+        pass  # Keep the Streamlit console quiet
+
+def make_server(host=CAL_WEBHOOK_HOST, port=CAL_WEBHOOK_PORT, secret=CAL_WEBHOOK_SECRET):
+    handler = type("ConfiguredWebhookHandler", (WebhookHandler,), {"secret": secret})
+    return ThreadingHTTPServer((host, port), handler)
+
+def start_background_server(host=CAL_WEBHOOK_HOST, port=CAL_WEBHOOK_PORT, secret=CAL_WEBHOOK_SECRET):
+    """
+    Starts the receiver on a daemon thread, once per process. Returns the server, or None (with a
+    warning) when it cannot listen, e.g. because another Streamlit process holds the port.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = make_server(host, port, secret)
+            except OSError as e:
+                _logger.warning("Cal.com webhook receiver not started on %s:%s: %s", host, port, e)
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
+
+# --- Replay harness ---
+# Replays recorded webhook bodies (one JSON object per line) against a receiver, signing each one,
+# so the write path can be exercised without a live Cal.com:
+#   python webhook.py replay recorded_webhooks.jsonl
+# Without --url, a receiver is started in-process on a free port and the resulting cache state is printed.
+
+def replay(path, url, secret):
+    results = []
+    with open(path, "rb") as f:
+        for line in f:
+            body = line.strip()
+            if not body:
+                continue
+            request = urllib.request.Request(url, data=body, method="POST", headers={
+                "Content-Type": "application/json",
+                SIGNATURE_HEADER: sign(body, secret)
+            })
+            try:
+                with urllib.request.urlopen(request) as response:
+                    results.append((response.status, json.loads(response.read())))
+            except urllib.error.HTTPError as e:
+                results.append((e.code, json.loads(e.read() or b"{}")))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Cal.com webhook receiver")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Run the receiver in the foreground")
+    serve_parser.add_argument("--host", default=CAL_WEBHOOK_HOST)
+    serve_parser.add_argument("--port", type=int, default=CAL_WEBHOOK_PORT)
+    replay_parser = subparsers.add_parser("replay", help="Replay recorded webhook bodies")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--url", help="Receiver URL (default: start one in-process)")
+    args = parser.parse_args()
+
+    secret = CAL_WEBHOOK_SECRET or "replay-secret"
+    if args.command == "serve":
+        if not CAL_WEBHOOK_SECRET:
+            parser.error("CAL_WEBHOOK_SECRET must be set")
+        try:
+            server = make_server(args.host, args.port, CAL_WEBHOOK_SECRET)
+        except OSError as e:
+            parser.error(f"cannot listen on {args.host}:{args.port}: {e}")
+        server.serve_forever()
+        return
+
+    url = args.url
+    if url is None:
+        server = start_background_server("127.0.0.1", 0, secret)
+        if server is None:
+            parser.error("cannot start an in-process receiver")
+        url = f"http://127.0.0.1:{server.server_port}/"
+    for status, result in replay(args.path, url, secret):
+        print(status, json.dumps(result))
+    if args.url is None:
+        print("booking index:", json.dumps(app.booking_index_stats()))
+        print("slots cache:", json.dumps(app.slots_cache_stats()))
+
+if __name__ == "__main__":
+    main()